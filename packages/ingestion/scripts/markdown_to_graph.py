@@ -7,11 +7,12 @@ summary of files that lacked usable data.
 """
 
 import argparse
-import json
 import re
 from pathlib import Path
 from typing import Iterable, List, Optional
 
+import orjson
+
 
 STATE_CODES = {
     "all states": ["NSW", "VIC", "QLD", "SA", "WA", "TAS", "NT", "ACT"],
@@ -30,22 +31,26 @@ STATE_CODES = {
     "new south wales": ["NSW"],
 }
 
+# STATE_CODES plus every "<state> only" variant, so lookups are a single probe.
+STATE_CODES_EXT = {
+    **STATE_CODES,
+    **{f"{name} only": codes for name, codes in STATE_CODES.items()},
+}
+
+STATE_SPLIT_RE = re.compile(r"[,/]|\band\b")
+
+
+# Splits a stripped table row on pipes, swallowing the padding around each cell.
+CELL_SPLIT_RE = re.compile(r"\s*\|\s*")
+
 
 def normalise_states(raw: str) -> List[str]:
     tokens: List[str] = []
-    for piece in re.split(r"[,/]|\band\b", raw.lower()):
-        piece = piece.strip()
-        if not piece:
-            continue
-        if piece in STATE_CODES:
-            tokens.extend(STATE_CODES[piece])
-        elif piece.endswith(" only") and piece[:-5] in STATE_CODES:
-            tokens.extend(STATE_CODES[piece[:-5]])
-    unique = []
-    for state in tokens:
-        if state not in unique:
-            unique.append(state)
-    return unique
+    for piece in STATE_SPLIT_RE.split(raw.lower()):
+        codes = STATE_CODES_EXT.get(piece.strip())
+        if codes:
+            tokens.extend(codes)
+    return list(dict.fromkeys(tokens))
 
 
 def extract_numbers(text: str) -> List[float]:
@@ -71,8 +76,7 @@ def parse_table(lines: Iterable[str]) -> List[List[str]]:
     for line in lines:
         if not line.strip().startswith("|"):
             break
-        cells = [cell.strip() for cell in line.strip().strip("|").split("|")]
-        rows.append(cells)
+        rows.append(CELL_SPLIT_RE.split(line.strip().strip("|").strip()))
     return rows
 
 
@@ -116,11 +120,7 @@ def process_markdown(md_path: Path) -> tuple[Optional[dict], Optional[str]]:
     for row in body:
         if len(row) < 5:
             continue
-        crop = row[0]
-        weed_text = row[1]
-        state_text = row[2]
-        rate_text = row[3]
-        comments = row[4] if len(row) > 4 else ""
+        crop, weed_text, state_text, rate_text, comments = row[:5]
 
         states = normalise_states(state_text)
         rate_value, rate_unit = extract_rate(rate_text)
@@ -186,14 +186,14 @@ def main():
             continue
 
         output_path = args.output_dir / (md_path.stem + ".json")
-        output_path.write_text(json.dumps(record, indent=2), encoding="utf-8")
+        output_path.write_bytes(orjson.dumps(record, option=orjson.OPT_INDENT_2))
 
         entry = {"file": md_path.name}
         if status:
             entry["warning"] = status
         summary["processed"].append(entry)
 
-    args.summary.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    args.summary.write_bytes(orjson.dumps(summary, option=orjson.OPT_INDENT_2))
 
 
 if __name__ == "__main__":
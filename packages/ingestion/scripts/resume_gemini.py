@@ -12,19 +12,37 @@ import logging
 import os
 import subprocess
 import sys
+import threading
 import time
 from pathlib import Path
 
 
-def run_single(pdf_path, output_dir, model, max_retries, base_delay):
-    base = Path(pdf_path).stem
-    out_json = Path(output_dir) / (base + ".json")
-    if out_json.exists() or (out_json.with_suffix(out_json.suffix + ".gz")).exists():
-        logging.info("Skipping %s (output exists)", pdf_path)
-        return True
+class StartLimiter:
+    """Shared rate limiter: at most one job start per `interval` seconds across all workers."""
 
+    def __init__(self, interval):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.next_start = time.monotonic()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_start)
+            self.next_start = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def output_exists(pdf_path, output_dir):
+    out_json = Path(output_dir) / (Path(pdf_path).stem + ".json")
+    return out_json.exists() or (out_json.with_suffix(out_json.suffix + ".gz")).exists()
+
+
+def run_single(pdf_path, output_dir, model, max_retries, base_delay, limiter):
     cmd = [sys.executable, "-m", "ingestion.gemini_parser", str(pdf_path), "--output", str(output_dir), "--model", model]
     for attempt in range(1, max_retries + 1):
+        limiter.wait()
         logging.info("Running: %s (attempt %d)", " ".join(cmd), attempt)
         proc = subprocess.run(cmd, capture_output=True, text=True)
         if proc.returncode == 0:
@@ -81,16 +99,26 @@ def main():
     if total == 0:
         return
 
-    # Use a ThreadPoolExecutor to allow limited concurrency.
+    # Skip finished outputs up front so they cost no delay
+    pending = []
+    skipped = 0
+    for pdf in pdfs:
+        if output_exists(pdf, output_dir):
+            logging.info("Skipping %s (output exists)", pdf)
+            skipped += 1
+        else:
+            pending.append(pdf)
+
+    # Use a ThreadPoolExecutor to allow limited concurrency; the limiter
+    # staggers job starts across all workers to respect delay.
+    limiter = StartLimiter(args.delay)
     with concurrent.futures.ThreadPoolExecutor(max_workers=args.max_concurrent) as exe:
         futures = []
-        for i, pdf in enumerate(pdfs, start=1):
-            # stagger starts to respect delay
-            time.sleep(args.delay)
-            futures.append(exe.submit(run_single, str(pdf), str(output_dir), args.model, args.max_retries, args.delay))
+        for pdf in pending:
+            futures.append(exe.submit(run_single, str(pdf), str(output_dir), args.model, args.max_retries, args.delay, limiter))
 
         # collect results
-        success = 0
+        success = skipped
         for fut in concurrent.futures.as_completed(futures):
             try:
                 ok = fut.result()
@@ -11,12 +11,21 @@ Removes noise from parsed markdown files to improve GraphRAG quality:
 """
 
 import re
+import mmap
 import argparse
 from pathlib import Path
-from typing import List, Tuple
-import json
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
 from datetime import datetime
 
+import orjson
+
+try:
+    import hyperscan
+except ImportError:  # optional: every noise pattern is then run with `re`
+    hyperscan = None
+
 
 # Patterns to remove (compiled for performance)
 NOISE_PATTERNS: List[Tuple[re.Pattern, str]] = [
@@ -147,8 +156,98 @@ NOISE_PATTERNS: List[Tuple[re.Pattern, str]] = [
 ]
 
 
+def build_noise_prefilter() -> Any:
+    """
+    Compile NOISE_PATTERNS into a single Hyperscan database.
+
+    Patterns are compiled in prefilter mode, so a scan reports a superset of
+    the patterns that can match (lookaheads etc. are approximated). It is only
+    used to skip `re` passes that cannot change the text; the substitutions
+    themselves are still done by `re`, so output is identical either way.
+    Returns None when Hyperscan is not installed or compilation fails.
+    """
+    if hyperscan is None:
+        return None
+
+    base_flags = (
+        hyperscan.HS_FLAG_PREFILTER | hyperscan.HS_FLAG_SINGLEMATCH
+        | hyperscan.HS_FLAG_ALLOWEMPTY | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP
+    )
+    expressions = []
+    flags = []
+    for pattern, _ in NOISE_PATTERNS:
+        pattern_flags = base_flags
+        if pattern.flags & re.IGNORECASE:
+            pattern_flags |= hyperscan.HS_FLAG_CASELESS
+        if pattern.flags & re.MULTILINE:
+            pattern_flags |= hyperscan.HS_FLAG_MULTILINE
+        if pattern.flags & re.DOTALL:
+            pattern_flags |= hyperscan.HS_FLAG_DOTALL
+        expressions.append(pattern.pattern.encode('utf-8'))
+        flags.append(pattern_flags)
+
+    database = hyperscan.Database()
+    try:
+        database.compile(
+            expressions=expressions,
+            ids=list(range(len(expressions))),
+            elements=len(expressions),
+            flags=flags,
+        )
+    except hyperscan.error:
+        return None
+    return database
+
+
+NOISE_PREFILTER = build_noise_prefilter()
+
+
+def scan_noise_candidates(text: str) -> Set[int]:
+    """Return indices of NOISE_PATTERNS that may match text (one Hyperscan pass)."""
+    found: Set[int] = set()
+
+    def on_match(pattern_id: int, start: int, end: int, flags: int, context: Any) -> None:
+        found.add(pattern_id)
+
+    NOISE_PREFILTER.scan(text.encode('utf-8'), match_event_handler=on_match)
+    return found
+
+
+def remove_noise(body: str) -> str:
+    """Apply NOISE_PATTERNS in order, skipping passes that cannot match."""
+    if NOISE_PREFILTER is None:
+        for pattern, replacement in NOISE_PATTERNS:
+            body = pattern.sub(replacement, body)
+        return body
+
+    # Patterns are applied sequentially, so an earlier substitution can create
+    # a match for a later pattern. Re-scan before skipping if the text changed.
+    candidates = scan_noise_candidates(body)
+    stale = False
+    for i, (pattern, replacement) in enumerate(NOISE_PATTERNS):
+        if i not in candidates:
+            if not stale:
+                continue
+            candidates = scan_noise_candidates(body)
+            stale = False
+            if i not in candidates:
+                continue
+        body, count = pattern.subn(replacement, body)
+        if count:
+            stale = True
+    return body
+
+
+# Files at least this large are decoded straight from a memory map
+MMAP_THRESHOLD = 1024 * 1024
+
+
+# Per-directory cache of input fingerprints for skipping unchanged files
+CLEAN_CACHE_NAME = '.clean-cache.json'
+
+
 # Boilerplate sections to deduplicate (keep only first occurrence)
-DEDUPE_PATTERNS = [
+DEDUPE_PATTERNS: List[str] = [
     # Safety headings that often repeat
     r'\*\*KEEP OUT OF REACH OF CHILDREN\*\*\s*\n\s*\*\*READ SAFETY DIRECTIONS BEFORE OPENING OR USING\*\*',
     # Product headers that repeat for different pack sizes
@@ -164,7 +263,7 @@ DEDUPE_PATTERNS = [
 
 def normalize_text(text: str) -> str:
     """Normalize text for comparison (lowercase, collapse whitespace)."""
-    return re.sub(r'\s+', ' ', text.lower().strip())
+    return ' '.join(text.lower().split())
 
 
 def extract_frontmatter(content: str) -> Tuple[str, str]:
@@ -176,6 +275,19 @@ def extract_frontmatter(content: str) -> Tuple[str, str]:
     return '', content
 
 
+def remove_spans(content: str, spans: List[Tuple[int, int]]) -> str:
+    """Drop the given (start, end) spans from content, rebuilding it once."""
+    if not spans:
+        return content
+    parts: List[str] = []
+    prev = 0
+    for start, end in sorted(spans):
+        parts.append(content[prev:start])
+        prev = end
+    parts.append(content[prev:])
+    return ''.join(parts)
+
+
 def deduplicate_sections(content: str) -> str:
     """Remove duplicate boilerplate sections, keeping first occurrence."""
     for pattern_str in DEDUPE_PATTERNS:
@@ -183,8 +295,7 @@ def deduplicate_sections(content: str) -> str:
         matches = list(pattern.finditer(content))
         if len(matches) > 1:
             # Keep first, remove rest
-            for match in reversed(matches[1:]):
-                content = content[:match.start()] + content[match.end():]
+            content = remove_spans(content, [(m.start(), m.end()) for m in matches[1:]])
     return content
 
 
@@ -196,8 +307,8 @@ def remove_duplicate_blocks(content: str) -> str:
     # Split into paragraphs (blocks separated by 2+ newlines)
     paragraphs = re.split(r'\n{2,}', content)
     
-    seen_normalized = set()
-    unique_paragraphs = []
+    seen_normalized: Set[str] = set()
+    unique_paragraphs: List[str] = []
     
     for para in paragraphs:
         # Skip very short paragraphs (likely headers or noise)
@@ -232,11 +343,14 @@ def remove_duplicate_product_headers(content: str) -> str:
     
     matches = list(header_pattern.finditer(content))
     if len(matches) > 1:
-        # Keep first, remove duplicates that are substantially similar
-        first_match_text = matches[0].group(0).lower().strip()
-        for match in reversed(matches[1:]):
-            if match.group(0).lower().strip() == first_match_text:
-                content = content[:match.start()] + content[match.end():]
+        # Keep first, remove duplicates that are substantially similar.
+        # Normalise each header once and compare the short strings directly.
+        keys = [m.group(0).lower().strip() for m in matches]
+        content = remove_spans(content, [
+            (matches[i].start(), matches[i].end())
+            for i in range(1, len(matches))
+            if keys[i] == keys[0]
+        ])
     
     return content
 
@@ -247,26 +361,29 @@ def clean_content(content: str) -> str:
     frontmatter, body = extract_frontmatter(content)
     
     # Apply noise removal patterns
-    for pattern, replacement in NOISE_PATTERNS:
-        body = pattern.sub(replacement, body)
+    body = remove_noise(body)
     
     # Deduplicate sections
     body = deduplicate_sections(body)
     body = remove_duplicate_product_headers(body)
     body = remove_duplicate_blocks(body)
     
-    # Clean up resulting whitespace
-    # Remove lines that are only whitespace
-    body = re.sub(r'^[ \t]+$', '', body, flags=re.MULTILINE)
-    
-    # Collapse multiple blank lines
-    body = re.sub(r'\n{3,}', '\n\n', body)
-    
-    # Remove trailing whitespace on lines
-    body = re.sub(r'[ \t]+$', '', body, flags=re.MULTILINE)
+    # Clean up resulting whitespace in a single pass over the lines:
+    # remove trailing spaces/tabs and collapse multiple blank lines
+    lines: List[str] = []
+    previous_blank = False
+    for line in body.split('\n'):
+        line = line.rstrip(' \t')
+        if not line:
+            if previous_blank:
+                continue
+            previous_blank = True
+        else:
+            previous_blank = False
+        lines.append(line)
     
     # Remove leading/trailing whitespace from body
-    body = body.strip()
+    body = '\n'.join(lines).strip()
     
     return frontmatter + '\n' + body + '\n'
 
@@ -275,11 +392,32 @@ def calculate_reduction(original: str, cleaned: str) -> Tuple[int, int, float]:
     """Calculate size reduction statistics."""
     orig_size = len(original)
     clean_size = len(cleaned)
-    reduction_pct = ((orig_size - clean_size) / orig_size * 100) if orig_size > 0 else 0
+    reduction_pct = ((orig_size - clean_size) / orig_size * 100) if orig_size > 0 else 0.0
     return orig_size, clean_size, reduction_pct
 
 
-def clean_file(input_path: Path, output_path: Path = None, in_place: bool = False) -> dict:
+def read_markdown(path: Path) -> str:
+    """
+    Read a markdown file as text with universal newlines.
+    
+    Large files are decoded directly from a read-only memory map, so the raw
+    bytes live in the OS page cache rather than a second heap copy.
+    """
+    if path.stat().st_size < MMAP_THRESHOLD:
+        return path.read_text(encoding='utf-8')
+    
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        content = str(memoryview(mm), 'utf-8')
+    if '\r' in content:
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
+    return content
+
+
+def clean_file(
+    input_path: Path,
+    output_path: Optional[Path] = None,
+    in_place: bool = False
+) -> Dict[str, Any]:
     """
     Clean a single markdown file.
     
@@ -291,7 +429,7 @@ def clean_file(input_path: Path, output_path: Path = None, in_place: bool = Fals
     Returns:
         Dictionary with cleaning statistics
     """
-    content = input_path.read_text(encoding='utf-8')
+    content = read_markdown(input_path)
     cleaned = clean_content(content)
     
     orig_size, clean_size, reduction_pct = calculate_reduction(content, cleaned)
@@ -312,20 +450,69 @@ def clean_file(input_path: Path, output_path: Path = None, in_place: bool = Fals
     }
 
 
+def safe_clean_file(input_path: Path, output_path: Optional[Path], in_place: bool) -> Dict[str, Any]:
+    """Run clean_file, returning an error entry instead of raising."""
+    try:
+        return clean_file(input_path, output_path, in_place)
+    except Exception as e:
+        return {'file': input_path.name, 'error': str(e)}
+
+
+# Job list installed once per worker process by init_clean_worker
+_worker_jobs: List[Tuple[Path, Optional[Path]]] = []
+_worker_in_place = False
+
+
+def init_clean_worker(jobs: List[Tuple[Path, Optional[Path]]], in_place: bool) -> None:
+    """ProcessPoolExecutor initializer: receive the job list once per worker."""
+    global _worker_jobs, _worker_in_place
+    _worker_jobs = jobs
+    _worker_in_place = in_place
+
+
+def clean_job(index: int) -> Dict[str, Any]:
+    """Clean the job at `index` of the worker's job list."""
+    input_path, output_path = _worker_jobs[index]
+    return safe_clean_file(input_path, output_path, _worker_in_place)
+
+
+def load_clean_cache(cache_path: Path) -> Dict[str, List[int]]:
+    """Load the input-file fingerprint cache used to skip unchanged files."""
+    if cache_path.exists():
+        try:
+            return orjson.loads(cache_path.read_bytes())
+        except (OSError, orjson.JSONDecodeError):
+            return {}
+    return {}
+
+
+def file_fingerprint(path: Path) -> List[int]:
+    """Cheap change detector for a file: [mtime_ns, size]."""
+    st = path.stat()
+    return [st.st_mtime_ns, st.st_size]
+
+
 def clean_directory(
     input_dir: Path,
-    output_dir: Path = None,
+    output_dir: Optional[Path] = None,
     in_place: bool = False,
-    pattern: str = '*.md'
-) -> dict:
+    pattern: str = '*.md',
+    force: bool = False,
+    workers: int = 1
+) -> Dict[str, Any]:
     """
     Clean all markdown files in a directory.
     
+    Files whose input is unchanged since the last run (same mtime and size,
+    tracked in CLEAN_CACHE_NAME) and whose output still exists are skipped.
+    
     Args:
         input_dir: Directory containing markdown files
         output_dir: Directory for cleaned output (optional)
         in_place: If True, overwrite input files
         pattern: Glob pattern for files to process
+        force: If True, re-clean every file regardless of the cache
+        workers: Number of worker processes (1 cleans in this process)
     
     Returns:
         Dictionary with aggregate statistics
@@ -341,41 +528,71 @@ def clean_directory(
         output_dir = Path(output_dir)
         output_dir.mkdir(parents=True, exist_ok=True)
     
-    results = []
+    cache_path = (output_dir if output_dir and not in_place else input_dir) / CLEAN_CACHE_NAME
+    cache: Dict[str, List[int]] = {} if force else load_clean_cache(cache_path)
+    
+    results: List[Dict[str, Any]] = []
     total_original = 0
     total_cleaned = 0
-    
-    for i, file_path in enumerate(files, 1):
-        try:
-            if in_place:
-                out_path = None
-            elif output_dir:
-                out_path = output_dir / file_path.name
-            else:
-                out_path = None
-            
-            stats = clean_file(file_path, out_path, in_place)
+    skipped = 0
+    
+    jobs: List[Tuple[Path, Optional[Path]]] = []
+    for file_path in files:
+        out_path: Optional[Path]
+        if in_place:
+            out_path = None
+            expected_output = file_path
+        elif output_dir:
+            out_path = output_dir / file_path.name
+            expected_output = out_path
+        else:
+            out_path = None
+            expected_output = file_path.with_suffix('.cleaned.md')
+        
+        if cache.get(str(file_path)) == file_fingerprint(file_path) and expected_output.exists():
+            skipped += 1
+            continue
+        jobs.append((file_path, out_path))
+    
+    with ExitStack() as stack:
+        outcomes: Iterable[Dict[str, Any]]
+        if workers > 1 and len(jobs) > 1:
+            # Workers receive the job list once at start-up; each task is
+            # then just an integer index into it.
+            executor = stack.enter_context(ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=init_clean_worker,
+                initargs=(jobs, in_place),
+            ))
+            chunksize = max(1, len(jobs) // (workers * 4))
+            outcomes = executor.map(clean_job, range(len(jobs)), chunksize=chunksize)
+        else:
+            outcomes = (safe_clean_file(path, out, in_place) for path, out in jobs)
+        
+        for i, ((file_path, _), stats) in enumerate(zip(jobs, outcomes), 1):
             results.append(stats)
+            if 'error' in stats:
+                print(f"Error processing {file_path.name}: {stats['error']}")
+                continue
+            
             total_original += stats['original_size']
             total_cleaned += stats['cleaned_size']
+            # Fingerprint after writing so in-place output is not re-cleaned
+            cache[str(file_path)] = file_fingerprint(file_path)
             
-            if i % 50 == 0 or i == len(files):
-                print(f"Processed {i}/{len(files)} files...")
-                
-        except Exception as e:
-            print(f"Error processing {file_path.name}: {e}")
-            results.append({
-                'file': file_path.name,
-                'error': str(e)
-            })
-    
-    total_reduction = ((total_original - total_cleaned) / total_original * 100) if total_original > 0 else 0
+            if i % 50 == 0 or i == len(jobs):
+                print(f"Processed {i}/{len(jobs)} files...")
+    
+    cache_path.write_bytes(orjson.dumps(cache))
+    
+    total_reduction = ((total_original - total_cleaned) / total_original * 100) if total_original > 0 else 0.0
     
     summary = {
         'timestamp': datetime.now().isoformat(),
         'files_processed': len(files),
         'files_succeeded': len([r for r in results if 'error' not in r]),
         'files_failed': len([r for r in results if 'error' in r]),
+        'files_skipped': skipped,
         'total_original_bytes': total_original,
         'total_cleaned_bytes': total_cleaned,
         'total_reduction_percent': round(total_reduction, 1),
@@ -386,7 +603,7 @@ def clean_directory(
     return summary
 
 
-def main():
+def main() -> None:
     """CLI entry point."""
     parser = argparse.ArgumentParser(
         description='Clean parsed herbicide label markdown files for GraphRAG'
@@ -411,6 +628,17 @@ def main():
         type=Path,
         help='Write cleaning statistics to JSON file'
     )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Re-clean all files even if unchanged since the last run'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Number of worker processes for directory cleaning (default: 1)'
+    )
     
     args = parser.parse_args()
     
@@ -420,18 +648,21 @@ def main():
         stats = clean_file(input_path, args.output, args.in_place)
         print(f"Cleaned {stats['file']}: {stats['original_size']} -> {stats['cleaned_size']} bytes "
               f"({stats['reduction_percent']}% reduction)")
-        summary = {'files': [stats]}
+        summary: Dict[str, Any] = {'files': [stats]}
     else:
-        summary = clean_directory(input_path, args.output, args.in_place)
+        summary = clean_directory(
+            input_path, args.output, args.in_place, force=args.force, workers=args.workers
+        )
         print(f"\nCleaning complete!")
         print(f"Files processed: {summary['files_processed']}")
         print(f"Succeeded: {summary['files_succeeded']}")
+        print(f"Skipped (unchanged): {summary['files_skipped']}")
         print(f"Failed: {summary['files_failed']}")
         print(f"Total size reduction: {summary['total_original_bytes']:,} -> {summary['total_cleaned_bytes']:,} bytes")
         print(f"Overall reduction: {summary['total_reduction_percent']}%")
     
     if args.stats_file:
-        args.stats_file.write_text(json.dumps(summary, indent=2))
+        args.stats_file.write_bytes(orjson.dumps(summary, option=orjson.OPT_INDENT_2))
         print(f"\nStatistics written to {args.stats_file}")
 
 
@@ -2,11 +2,18 @@
 from __future__ import annotations
 
 import argparse
-import json
+import functools
+import os
+import queue
+import threading
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from io import BytesIO
 from pathlib import Path
 from typing import Iterable, List, Optional
 
-from docling.datamodel.base_models import InputFormat
+import orjson
+from docling.datamodel.base_models import DocumentStream, InputFormat
 from docling.datamodel.pipeline_options import PdfPipelineOptions, TableFormerMode
 from docling.document_converter import DocumentConverter, PdfFormatOption
 from docling_core.types.doc import DocItem, DocItemLabel
@@ -21,11 +28,18 @@ def _collect_pdfs(path: Path) -> List[Path]:
 
 
 def _bbox_from_item(item: DocItem) -> Optional[dict]:
-    provenance = getattr(item, "prov", None) or []
+    provenance = getattr(item, "prov", None)
+    if not provenance:
+        return None
     for entry in provenance:
         bbox = getattr(entry, "bbox", None)
         if bbox is None:
             continue
+        try:
+            # Docling ProvenanceItem/BoundingBox fields, in the document's coordinate origin
+            return {"x0": bbox.l, "y0": bbox.t, "x1": bbox.r, "y1": bbox.b, "page": entry.page_no}
+        except AttributeError:
+            pass
         return {
             "x0": getattr(bbox, "x0", None),
             "y0": getattr(bbox, "y0", None),
@@ -36,11 +50,15 @@ def _bbox_from_item(item: DocItem) -> Optional[dict]:
     return None
 
 
-def _serialize_tables(document) -> Iterable[dict]:
+def _serialize_tables(document, include_markdown: bool = True) -> Iterable[dict]:
     for idx, table in enumerate(document.tables, start=1):
         dataframe = table.export_to_dataframe() if hasattr(table, "export_to_dataframe") else None
-        rows = dataframe.fillna("").values.tolist() if dataframe is not None else []
-        markdown = table.export_to_markdown(doc=document) if hasattr(table, "export_to_markdown") else None
+        rows = dataframe.to_numpy(dtype=object, na_value="").tolist() if dataframe is not None else []
+        markdown = (
+            table.export_to_markdown(doc=document)
+            if include_markdown and hasattr(table, "export_to_markdown")
+            else None
+        )
         yield {
             "id": getattr(table, "id", None) or f"table-{idx}",
             "title": getattr(table, "title", None),
@@ -52,57 +70,247 @@ def _serialize_tables(document) -> Iterable[dict]:
         }
 
 
+_TRACKED_TEXT_LABELS = frozenset({
+    DocItemLabel.SECTION_HEADER,
+    DocItemLabel.PARAGRAPH,
+    DocItemLabel.TEXT,
+    DocItemLabel.LIST_ITEM,
+})
+
+
 def _serialize_text_items(document) -> Iterable[dict]:
-    tracked_labels = {
-        DocItemLabel.SECTION_HEADER,
-        DocItemLabel.PARAGRAPH,
-        DocItemLabel.TEXT,
-        DocItemLabel.LIST_ITEM,
-    }
-    for item in document.iterate_items():
-        if getattr(item, "label", None) not in tracked_labels:
+    # iterate_items yields (item, level) pairs; with groups excluded every
+    # item is a DocItem, and the tracked labels are all TextItems.
+    for item, _level in document.iterate_items():
+        label = item.label
+        if label not in _TRACKED_TEXT_LABELS:
             continue
-        content = getattr(item, "text", "").strip()
+        content = item.text.strip()
         if not content:
             continue
         yield {
-            "label": getattr(item.label, "name", str(item.label)),
+            "label": label.name,
             "text": content,
             "bbox": _bbox_from_item(item),
         }
 
 
-def convert_pdf(pdf_path: Path, converter: DocumentConverter) -> dict:
-    result = converter.convert(str(pdf_path))
+def convert_pdf(
+    pdf_path: Path,
+    converter: DocumentConverter,
+    *,
+    include_markdown: bool = True,
+    table_fast_path: bool = False,
+) -> dict:
+    result = _convert(str(pdf_path), converter, table_fast_path=table_fast_path)
+    return _payload_from_result(pdf_path, result, include_markdown=include_markdown)
+
+
+def _convert(source, converter: DocumentConverter, *, table_fast_path: bool = False):
+    """Convert a path or DocumentStream.
+
+    With table_fast_path, a layout-only pass runs first; its result is kept
+    when the layout found no tables, and only documents with tables pay for
+    the full TableFormer pass.
+    """
+    if table_fast_path:
+        result = get_layout_converter().convert(source)
+        if not result.document.tables:
+            return result
+        if isinstance(source, DocumentStream):
+            source.stream.seek(0)
+    return converter.convert(source)
+
+
+def _payload_from_result(pdf_path: Path, result, *, include_markdown: bool = True, lazy: bool = False) -> dict:
+    """Build the output payload; with lazy=True the item lists are left as
+    generators for _write_payload to consume one element at a time."""
     document = result.document
     metadata = {
         "page_count": getattr(result.input, "page_count", None),
         "filesize": getattr(result.input, "filesize", None),
         "format": getattr(result.input, "format", None),
     }
+    text_items = _serialize_text_items(document)
+    tables = _serialize_tables(document, include_markdown)
     return {
         "source_path": str(pdf_path),
         "metadata": metadata,
-        "text_items": list(_serialize_text_items(document)),
-        "tables": list(_serialize_tables(document)),
+        "text_items": text_items if lazy else list(text_items),
+        "tables": tables if lazy else list(tables),
     }
 
 
-def build_converter() -> DocumentConverter:
-    pipeline_options = PdfPipelineOptions(do_table_structure=True)
-    pipeline_options.table_structure_options.mode = TableFormerMode.ACCURATE
+def build_converter(do_table_structure: bool = True) -> DocumentConverter:
+    pipeline_options = PdfPipelineOptions(do_table_structure=do_table_structure)
+    if do_table_structure:
+        pipeline_options.table_structure_options.mode = TableFormerMode.ACCURATE
     format_options = {
         InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)
     }
     return DocumentConverter(format_options=format_options)
 
 
+@functools.lru_cache(maxsize=1)
+def get_converter() -> DocumentConverter:
+    """Process-wide converter; the layout and TableFormer models load once."""
+    return build_converter()
+
+
+@functools.lru_cache(maxsize=1)
+def get_layout_converter() -> DocumentConverter:
+    """Process-wide converter without table structure recognition."""
+    return build_converter(do_table_structure=False)
+
+
+_WRITE_BUFFER_SIZE = 1 << 16
+
+
+def _write_payload(out_path: Path, payload: dict) -> None:
+    """Write a payload as compact JSON through a buffered file.
+
+    List and iterator fields (text items, tables) are serialized one element
+    at a time, so only a single item's bytes exist at once rather than the
+    whole document; with a lazy payload the items themselves are never held
+    together either.
+
+    Lazy items are produced while the file is being written, so the JSON goes
+    to a temp file that only replaces out_path once complete; a failure
+    mid-document never leaves a truncated file for --skip-existing to keep.
+    """
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    try:
+        _write_json(tmp_path, payload)
+        os.replace(tmp_path, out_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def _write_json(path: Path, payload: dict) -> None:
+    option = orjson.OPT_SERIALIZE_NUMPY
+    with path.open("wb", buffering=_WRITE_BUFFER_SIZE) as fh:
+        fh.write(b"{")
+        for index, (key, value) in enumerate(payload.items()):
+            if index:
+                fh.write(b",")
+            fh.write(orjson.dumps(key))
+            fh.write(b":")
+            if not isinstance(value, (list, Iterator)):
+                fh.write(orjson.dumps(value, option=option))
+                continue
+            fh.write(b"[")
+            for position, element in enumerate(value):
+                if position:
+                    fh.write(b",")
+                fh.write(orjson.dumps(element, option=option))
+            fh.write(b"]")
+        fh.write(b"}")
+
+
+def _init_worker(table_fast_path: bool = False) -> None:
+    # Load the PDF pipeline models while the pool spins up, so the first
+    # conversion in each worker does not pay for them.
+    get_converter().initialize_pipeline(InputFormat.PDF)
+    if table_fast_path:
+        get_layout_converter().initialize_pipeline(InputFormat.PDF)
+
+
+def _convert_one(
+    pdf_path: Path,
+    output_dir: Path,
+    include_markdown: bool = True,
+    table_fast_path: bool = False,
+) -> Path:
+    out_path = output_dir / (pdf_path.stem + ".docling.json")
+    result = _convert(str(pdf_path), get_converter(), table_fast_path=table_fast_path)
+    payload = _payload_from_result(pdf_path, result, include_markdown=include_markdown, lazy=True)
+    _write_payload(out_path, payload)
+    return out_path
+
+
+# Bounded hand-off between pipeline stages; provides backpressure so the
+# loader never runs far ahead of model inference.
+_PIPELINE_QUEUE_SIZE = 8
+
+
+def _run_pipeline(
+    pdfs: List[Path],
+    output_dir: Path,
+    converter: DocumentConverter,
+    include_markdown: bool = True,
+    table_fast_path: bool = False,
+) -> List[Path]:
+    """Overlap PDF reads, Docling inference and JSON writes across threads.
+
+    A loader thread reads PDF bytes, a converter thread runs the models, and
+    the calling thread serializes and writes results. The first error stops
+    new work, lets the queues drain, and is re-raised here.
+    """
+    loaded: queue.Queue = queue.Queue(maxsize=_PIPELINE_QUEUE_SIZE)
+    converted: queue.Queue = queue.Queue(maxsize=_PIPELINE_QUEUE_SIZE)
+    errors: List[BaseException] = []
+
+    def load() -> None:
+        try:
+            for pdf in pdfs:
+                if errors:
+                    break
+                loaded.put((pdf, pdf.read_bytes()))
+        except BaseException as exc:
+            errors.append(exc)
+        finally:
+            loaded.put(None)
+
+    def convert() -> None:
+        while (job := loaded.get()) is not None:
+            if errors:
+                continue
+            pdf, data = job
+            try:
+                print(f"Processing {pdf.name}")
+                source = DocumentStream(name=pdf.name, stream=BytesIO(data))
+                result = _convert(source, converter, table_fast_path=table_fast_path)
+                converted.put((pdf, result))
+            except BaseException as exc:
+                errors.append(exc)
+        converted.put(None)
+
+    threads = [
+        threading.Thread(target=load, name="docling-loader", daemon=True),
+        threading.Thread(target=convert, name="docling-converter", daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+
+    output_paths: List[Path] = []
+    while (job := converted.get()) is not None:
+        if errors:
+            continue
+        pdf, result = job
+        try:
+            out_path = output_dir / (pdf.stem + ".docling.json")
+            payload = _payload_from_result(pdf, result, include_markdown=include_markdown, lazy=True)
+            _write_payload(out_path, payload)
+            output_paths.append(out_path)
+        except BaseException as exc:
+            errors.append(exc)
+
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return output_paths
+
+
 def run(
     input_path: Path,
     output_dir: Optional[Path],
     *,
     limit: Optional[int] = None,
     skip_existing: bool = False,
+    workers: int = 1,
+    include_markdown: bool = True,
+    table_fast_path: bool = False,
 ) -> List[Path]:
     pdfs = _collect_pdfs(input_path)
     if not pdfs:
@@ -111,23 +319,28 @@ def run(
         pdfs = [pdf for pdf in pdfs if not (output_dir / (pdf.stem + ".docling.json")).exists()]
     if limit is not None:
         pdfs = pdfs[:limit]
-    converter = build_converter()
     output_paths: List[Path] = []
-    for pdf in pdfs:
-        if output_dir is None:
-            print(f"Processing {pdf.name}")
-            payload = convert_pdf(pdf, converter)
-            print(json.dumps(payload, indent=2))
-            continue
+    if workers > 1 and output_dir is not None and len(pdfs) > 1:
         output_dir.mkdir(parents=True, exist_ok=True)
-        out_path = output_dir / (pdf.stem + ".docling.json")
-        if skip_existing and out_path.exists():
-            print(f"Skipping existing output for {pdf.name}")
-            continue
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(table_fast_path,)
+        ) as executor:
+            futures = {
+                executor.submit(_convert_one, pdf, output_dir, include_markdown, table_fast_path): pdf
+                for pdf in pdfs
+            }
+            for future in as_completed(futures):
+                output_paths.append(future.result())
+                print(f"Processed {futures[future].name}")
+        return output_paths
+    converter = get_converter()
+    if output_dir is not None:
+        output_dir.mkdir(parents=True, exist_ok=True)
+        return _run_pipeline(pdfs, output_dir, converter, include_markdown, table_fast_path)
+    for pdf in pdfs:
         print(f"Processing {pdf.name}")
-        payload = convert_pdf(pdf, converter)
-        out_path.write_text(json.dumps(payload, indent=2))
-        output_paths.append(out_path)
+        payload = convert_pdf(pdf, converter, include_markdown=include_markdown, table_fast_path=table_fast_path)
+        print(orjson.dumps(payload, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY).decode())
     return output_paths
 
 
@@ -137,8 +350,23 @@ def main() -> None:
     parser.add_argument("--output", type=Path, help="Directory for JSON outputs")
     parser.add_argument("--limit", type=int, help="Maximum number of PDFs to process")
     parser.add_argument("--skip-existing", action="store_true", help="Skip PDFs with existing Docling outputs")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for parallel conversion (requires --output)")
+    parser.add_argument("--no-table-markdown", action="store_true", help="Omit the markdown rendering of each table")
+    parser.add_argument(
+        "--table-fast-path",
+        action="store_true",
+        help="Run a layout-only pass first and use TableFormer only for PDFs with tables",
+    )
     args = parser.parse_args()
-    run(args.input, args.output, limit=args.limit, skip_existing=args.skip_existing)
+    run(
+        args.input,
+        args.output,
+        limit=args.limit,
+        skip_existing=args.skip_existing,
+        workers=args.workers,
+        include_markdown=not args.no_table_markdown,
+        table_fast_path=args.table_fast_path,
+    )
 
 
 if __name__ == "__main__":
@@ -5,24 +5,34 @@ Reads the already-parsed .md files and uses Gemini to extract structured
 data into a clean JSON schema optimized for GraphRAG.
 """
 
-import json
 import asyncio
+import functools
 import time
 import signal
 from pathlib import Path
-from typing import Optional
+from typing import Literal, Optional, Union
 from datetime import datetime
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
-from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 import os
+import re
 
+import httpx
+import orjson
+from tenacity import AsyncRetrying, retry_if_result, stop_after_attempt, wait_exponential
 from google import genai
 from google.genai import types
 
 
-# Load environment variables
-load_dotenv()
+# Markdown inputs to extract: skip metadata (_*), cleaned copies and test files
+MARKDOWN_INPUT_RE = re.compile(r'^(?!_)(?!.*cleaned)(?!.*test).*\.md$')
+
+
+def list_markdown_inputs(input_dir: Path) -> list[Path]:
+    """List extractable markdown files in one scandir pass, filtered by a single regex."""
+    with os.scandir(input_dir) as entries:
+        return [Path(entry.path) for entry in entries
+                if MARKDOWN_INPUT_RE.match(entry.name) and entry.is_file()]
 
 
 class APITimeoutError(Exception):
@@ -32,16 +42,21 @@ class APITimeoutError(Exception):
 
 # ============== PYDANTIC SCHEMA FOR HERBICIDE DATA ==============
 
+# Small closed vocabularies shrink the constrained-decoding mask and validate by lookup
+ControlLevel = Literal['control', 'suppression', 'partial control']
+Timing = Literal['Pre-emergence', 'Post-emergence', 'Pre-plant', 'Post-plant']
+
+
 class WeedControlEntry(BaseModel):
     """A single weed control entry from the Directions for Use table."""
     crop: str = Field(description="The crop this herbicide is registered for")
-    application_timing: Optional[str] = Field(default=None, description="Pre-emergence, post-emergence, or other timing")
+    application_timing: Optional[Timing] = Field(default=None, description="Application timing relative to crop/weed emergence")
     weed_common_name: str = Field(description="Common name of the weed controlled")
     weed_scientific_name: Optional[str] = Field(default=None, description="Scientific name if provided")
     states: list[str] = Field(description="Australian states where registered (NSW, VIC, QLD, SA, WA, TAS, NT, ACT)")
     rate_per_ha: str = Field(description="Application rate per hectare")
     critical_comments: Optional[str] = Field(default=None, description="Important application notes")
-    control_level: str = Field(default="control", description="control, suppression, or partial")
+    control_level: ControlLevel = Field(default="control", description="control, suppression, or partial control")
 
 
 class HerbicideLabel(BaseModel):
@@ -71,10 +86,19 @@ class HerbicideLabel(BaseModel):
     compatible_products: list[str] = Field(default_factory=list, description="Tank mix compatible products")
 
 
+class ExtractedLabel(HerbicideLabel):
+    """HerbicideLabel plus extraction metadata, written out as `_metadata`."""
+    metadata: dict[str, str] = Field(serialization_alias='_metadata')
+
+
 # ============== GEMINI CLIENT ==============
 
+@functools.lru_cache(maxsize=1)
 def get_client() -> genai.Client:
-    """Initialize Gemini client with API key."""
+    """Initialize Gemini client with API key (created once per process)."""
+    # Load .env lazily, and skip parsing it when the key is already set
+    if not os.getenv("GEMINI_API_KEY"):
+        load_dotenv()
     api_key = os.getenv("GEMINI_API_KEY")
     if not api_key:
         raise ValueError("GEMINI_API_KEY not found in environment variables")
@@ -99,7 +123,8 @@ FOR WEED CONTROL ENTRIES:
 - Scientific names are in parentheses or italics: _Raphanus raphanistrum_
 - States should be abbreviated: NSW, VIC, QLD, SA, WA, TAS, NT, ACT
 - If states say "all states" or similar, list all 8 states
-- control_level: "control" unless "suppression" or "partial" is mentioned
+- control_level: "control" unless "suppression" ("suppression") or "partial" ("partial control") is mentioned
+- application_timing: normalize to Pre-emergence, Post-emergence, Pre-plant or Post-plant; leave empty if none fits
 
 If data is missing or the document appears empty, return minimal valid data with empty lists.
 
@@ -107,22 +132,162 @@ MARKDOWN CONTENT TO EXTRACT:
 """
 
 
-def _call_gemini(client, model, content, prompt):
-    """Internal function to call Gemini API (for timeout wrapper)."""
-    response = client.models.generate_content(
-        model=model,
-        contents=prompt + "\n\n" + content,
-        config=types.GenerateContentConfig(
-            response_mime_type='application/json',
-            response_schema=HerbicideLabel,
-            temperature=0.1,
-            http_options={'timeout': 60000},  # 60 second HTTP timeout
-        )
+def _extraction_config(
+    cached_content: Optional[str] = None,
+    http_timeout_ms: int = 60000
+) -> types.GenerateContentConfig:
+    return types.GenerateContentConfig(
+        response_mime_type='application/json',
+        response_schema=HerbicideLabel,
+        temperature=0.1,
+        cached_content=cached_content,
+        http_options={'timeout': http_timeout_ms},  # 60 second HTTP timeout by default
     )
+
+
+def _response_label(response) -> Union[HerbicideLabel, dict]:
+    # Keep the parsed model so it can be serialized straight to JSON;
+    # fall back to the raw JSON when the SDK could not validate it
     if response.parsed:
-        return response.parsed.model_dump()
+        return response.parsed
+    else:
+        return orjson.loads(response.text)
+
+
+def _label_dict(label: Union[HerbicideLabel, dict]) -> dict:
+    return label.model_dump() if isinstance(label, BaseModel) else label
+
+
+def _save_extraction(output_path: Path, label: Union[HerbicideLabel, dict], md_path: Path, model: str) -> dict:
+    """Write a label with its `_metadata` to output_path in one serialization pass."""
+    metadata = {
+        'source_file': md_path.name,
+        'extracted_at': datetime.now().isoformat(),
+        'model': model
+    }
+    if isinstance(label, BaseModel):
+        extracted = ExtractedLabel.model_construct(**dict(label), metadata=metadata)
+        output_path.write_bytes(extracted.model_dump_json(indent=2, by_alias=True).encode('utf-8'))
+        crops, weeds, entries = label.registered_crops, label.registered_weeds, label.weed_control_entries
     else:
-        return json.loads(response.text)
+        label['_metadata'] = metadata
+        output_path.write_bytes(orjson.dumps(label, option=orjson.OPT_INDENT_2))
+        crops = label.get('registered_crops', [])
+        weeds = label.get('registered_weeds', [])
+        entries = label.get('weed_control_entries', [])
+    return {
+        'status': 'success',
+        'file': md_path.name,
+        'crops': len(crops),
+        'weeds': len(weeds),
+        'entries': len(entries)
+    }
+
+
+# Truncate very long content to avoid timeouts (keep first 15000 chars)
+MAX_CONTENT_CHARS = 15000
+TRUNCATION_MARKER = "\n\n[... content truncated ...]"
+
+
+def _request_text(markdown_content: str, prompt: Optional[str] = None) -> str:
+    """Build the request text (optional prompt + truncated markdown) in a single join."""
+    parts = [prompt, "\n\n"] if prompt else []
+    parts.append(markdown_content[:MAX_CONTENT_CHARS])
+    if len(markdown_content) > MAX_CONTENT_CHARS:
+        parts.append(TRUNCATION_MARKER)
+    return "".join(parts)
+
+
+def _call_gemini(client, model, content, prompt, http_timeout_ms=60000):
+    """Internal function calling the sync Gemini API.
+    
+    Used by the sync wrappers, which may run once per asyncio.run loop and
+    so must not share the memoized client's aio session.
+    """
+    response = client.models.generate_content(
+        model=model,
+        contents=_request_text(content, prompt),
+        config=_extraction_config(None, http_timeout_ms)
+    )
+    return _response_label(response)
+
+
+async def _call_gemini_async(client, model, content, prompt, cached_content=None, http_timeout_ms=60000):
+    """Internal coroutine calling the async Gemini API.
+    
+    When cached_content names a context cache holding the prompt, only the
+    markdown is sent.
+    """
+    response = await client.aio.models.generate_content(
+        model=model,
+        contents=_request_text(content, None if cached_content else prompt),
+        config=_extraction_config(cached_content, http_timeout_ms)
+    )
+    return _response_label(response)
+
+
+# Smallest context cache Gemini accepts: 1024 tokens on Flash models, 4096 on Pro
+MIN_CACHE_TOKENS = {'flash': 1024}
+DEFAULT_MIN_CACHE_TOKENS = 4096
+
+
+def _min_cache_tokens(model: str) -> int:
+    for family, tokens in MIN_CACHE_TOKENS.items():
+        if family in model:
+            return tokens
+    return DEFAULT_MIN_CACHE_TOKENS
+
+
+async def create_prompt_cache(client: genai.Client, model: str, ttl: str = "3600s") -> Optional[str]:
+    """
+    Store EXTRACTION_PROMPT in a Gemini context cache for a directory run.
+    
+    Returns the cache name, or None if caching is unavailable, in which case
+    the prompt is sent inline with every request. The prompt is token-counted
+    first and no cache is created when it is below the model's minimum
+    cacheable size (the current prompt is a few hundred tokens).
+    """
+    try:
+        counted = await client.aio.models.count_tokens(model=model, contents=EXTRACTION_PROMPT)
+        if counted.total_tokens < _min_cache_tokens(model):
+            print(f"Prompt is {counted.total_tokens} tokens, below the cache minimum; sending it inline")
+            return None
+        cache = await client.aio.caches.create(
+            model=model,
+            config=types.CreateCachedContentConfig(
+                contents=[EXTRACTION_PROMPT],
+                ttl=ttl,
+            )
+        )
+    except Exception as e:
+        print(f"Prompt caching unavailable, sending prompt inline: {e}")
+        return None
+    return cache.name
+
+
+async def delete_prompt_cache(client: genai.Client, name: Optional[str]) -> None:
+    """Delete a context cache created by create_prompt_cache (best effort)."""
+    if not name:
+        return
+    try:
+        await client.aio.caches.delete(name=name)
+    except Exception:
+        pass
+
+
+class RequestPacer:
+    """Spaces out request starts by a minimum interval across concurrent tasks."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next_start = 0.0
+
+    async def wait(self) -> None:
+        now = time.monotonic()
+        start = max(now, self._next_start)
+        self._next_start = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
 
 
 def extract_from_markdown(
@@ -146,59 +311,153 @@ def extract_from_markdown(
     Raises:
         APITimeoutError: If the API call takes longer than timeout_seconds
     """
-    # Truncate very long content to avoid timeouts (keep first 15000 chars)
-    if len(markdown_content) > 15000:
-        markdown_content = markdown_content[:15000] + "\n\n[... content truncated ...]"
+    return _label_dict(_extract_label(markdown_content, client, model, timeout_seconds))
+
+
+async def extract_from_markdown_async(
+    markdown_content: str,
+    client: genai.Client,
+    model: str = "gemini-2.5-flash-lite",
+    timeout_seconds: int = 90,
+    cached_content: Optional[str] = None
+) -> dict:
+    """
+    Async variant of extract_from_markdown using the SDK's aio client.
     
-    # Use ThreadPoolExecutor for timeout handling
-    with ThreadPoolExecutor(max_workers=1) as executor:
-        future = executor.submit(_call_gemini, client, model, markdown_content, EXTRACTION_PROMPT)
-        try:
-            return future.result(timeout=timeout_seconds)
-        except FuturesTimeoutError:
-            raise APITimeoutError(f"API call timed out after {timeout_seconds} seconds")
+    The timeout is enforced with asyncio.wait_for, so no worker thread is needed.
+    cached_content optionally names a prompt cache from create_prompt_cache.
+    
+    Raises:
+        APITimeoutError: If the API call takes longer than timeout_seconds
+    """
+    return _label_dict(await _extract_label_async(
+        markdown_content, client, model, timeout_seconds, cached_content
+    ))
+
+
+async def _extract_label_async(markdown_content, client, model, timeout_seconds=90, cached_content=None):
+    """Like extract_from_markdown_async, but returns the parsed model when available."""
+    # The HTTP timeout stays at two thirds of the overall one (60s of 90s)
+    http_timeout_ms = timeout_seconds * 2000 // 3
+    try:
+        return await asyncio.wait_for(
+            _call_gemini_async(client, model, markdown_content, EXTRACTION_PROMPT, cached_content, http_timeout_ms),
+            timeout=timeout_seconds
+        )
+    except asyncio.TimeoutError:
+        raise APITimeoutError(f"API call timed out after {timeout_seconds} seconds")
+
+
+def _extract_label(markdown_content, client, model, timeout_seconds=90):
+    """Sync counterpart of _extract_label_async, bounded by the HTTP timeout."""
+    try:
+        return _call_gemini(client, model, markdown_content, EXTRACTION_PROMPT, timeout_seconds * 1000)
+    except httpx.TimeoutException:
+        raise APITimeoutError(f"API call timed out after {timeout_seconds} seconds")
+
+
+MIN_CONTENT_CHARS = 100
+
+# Output directories already created in this process
+_created_dirs: set[Path] = set()
+
+
+def _ensure_dir(directory: Path) -> None:
+    """mkdir -p once per directory per process."""
+    if directory not in _created_dirs:
+        directory.mkdir(parents=True, exist_ok=True)
+        _created_dirs.add(directory)
+
+
+def _is_too_short(content: str) -> bool:
+    """True if content has fewer than MIN_CONTENT_CHARS once stripped."""
+    # A stripped prefix that is already long enough settles it without
+    # copying the whole document
+    if len(content[:2 * MIN_CONTENT_CHARS].strip()) >= MIN_CONTENT_CHARS:
+        return False
+    return len(content.strip()) < MIN_CONTENT_CHARS
+
+
+def _load_input(md_path: Path, output_path: Path, skip_existing: bool) -> tuple[Optional[dict], str]:
+    """Return (skip result, '') for files not worth sending, else (None, content)."""
+    if skip_existing and output_path.exists():
+        return {
+            'status': 'skipped',
+            'reason': 'already exists',
+            'file': md_path.name
+        }, ''
+    
+    # Skip very short files (likely empty or failed parses); a file with
+    # fewer bytes than the minimum cannot have enough characters
+    if md_path.stat().st_size < MIN_CONTENT_CHARS:
+        content = ''
+    else:
+        content = md_path.read_text(encoding='utf-8')
+    if _is_too_short(content):
+        return {
+            'status': 'skipped',
+            'reason': 'content too short',
+            'file': md_path.name
+        }, ''
+    return None, content
 
 
 def process_single_file(
     md_path: Path,
     output_path: Path,
     client: genai.Client,
-    model: str = "gemini-2.5-flash-lite"
+    model: str = "gemini-2.5-flash-lite",
+    skip_existing: bool = False
 ) -> dict:
     """Process a single markdown file."""
-    content = md_path.read_text(encoding='utf-8')
+    skipped, content = _load_input(md_path, output_path, skip_existing)
+    if skipped:
+        return skipped
+    
+    try:
+        label = _extract_label(content, client, model)
+        _ensure_dir(output_path.parent)
+        return _save_extraction(output_path, label, md_path, model)
     
-    # Skip very short files (likely empty or failed parses)
-    if len(content.strip()) < 100:
+    except APITimeoutError as e:
         return {
-            'status': 'skipped',
-            'reason': 'content too short',
-            'file': md_path.name
+            'status': 'timeout',
+            'file': md_path.name,
+            'error': str(e)
         }
-    
-    try:
-        data = extract_from_markdown(content, client, model)
         
-        # Add metadata
-        data['_metadata'] = {
-            'source_file': md_path.name,
-            'extracted_at': datetime.now().isoformat(),
-            'model': model
+    except Exception as e:
+        return {
+            'status': 'error',
+            'file': md_path.name,
+            'error': str(e)
         }
+
+
+async def process_single_file_async(
+    md_path: Path,
+    output_path: Path,
+    client: genai.Client,
+    model: str = "gemini-2.5-flash-lite",
+    cached_content: Optional[str] = None,
+    skip_existing: bool = False,
+    timeout_seconds: int = 90
+) -> dict:
+    """Process a single markdown file (coroutine)."""
+    skipped, content = _load_input(md_path, output_path, skip_existing)
+    if skipped:
+        return skipped
+    
+    try:
+        label = await _extract_label_async(
+            content, client, model, timeout_seconds, cached_content=cached_content
+        )
         
         # Ensure output directory exists
-        output_path.parent.mkdir(parents=True, exist_ok=True)
+        _ensure_dir(output_path.parent)
         
-        # Save JSON
-        output_path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
-        
-        return {
-            'status': 'success',
-            'file': md_path.name,
-            'crops': len(data.get('registered_crops', [])),
-            'weeds': len(data.get('registered_weeds', [])),
-            'entries': len(data.get('weed_control_entries', []))
-        }
+        # Save JSON with metadata
+        return _save_extraction(output_path, label, md_path, model)
     
     except APITimeoutError as e:
         return {
@@ -215,35 +474,47 @@ def process_single_file(
         }
 
 
-def process_directory(
+# Timeout for the retry pass: double the default per-call timeout
+RETRY_TIMEOUT_SECONDS = 180
+
+
+async def process_directory(
     input_dir: Path,
     output_dir: Path,
     model: str = "gemini-2.0-flash",
     delay: float = 0.5,
-    limit: int = None
+    limit: int = None,
+    max_concurrent: int = 8,
+    use_prompt_cache: bool = False,
+    timeout_retries: int = 3
 ) -> dict:
     """
-    Process all markdown files in a directory.
+    Process all markdown files in a directory concurrently.
+    
+    Files that time out are retried after the main pass, one at a time with
+    a doubled timeout: once straight away, then after backoff waits of 30s,
+    60s, 120s, ... (timeout_retries waits in total).
     
     Args:
         input_dir: Directory containing .md files
         output_dir: Directory for JSON output
         model: Gemini model to use
-        delay: Delay between API calls (rate limiting)
+        delay: Minimum delay between API call starts (rate limiting)
         limit: Maximum files to process (None = all)
+        max_concurrent: Maximum API calls in flight at once
+        use_prompt_cache: Try sending EXTRACTION_PROMPT once via Gemini context
+            caching (off by default: the prompt is below the minimum cache size)
+        timeout_retries: Backed-off retries per timed-out file after the immediate one (0 = no retry pass)
     
     Returns:
         Summary statistics
     """
     input_dir = Path(input_dir)
     output_dir = Path(output_dir)
-    output_dir.mkdir(parents=True, exist_ok=True)
+    _ensure_dir(output_dir)
     
     # Get markdown files (exclude metadata files)
-    md_files = [f for f in input_dir.glob("*.md") 
-                if not f.name.startswith('_') 
-                and 'cleaned' not in f.name
-                and 'test' not in f.name]
+    md_files = list_markdown_inputs(input_dir)
     
     if limit:
         md_files = md_files[:limit]
@@ -258,35 +529,67 @@ def process_directory(
     }
     
     total = len(md_files)
+    semaphore = asyncio.Semaphore(max_concurrent)
+    pacer = RequestPacer(delay)
     
-    for i, md_path in enumerate(md_files, 1):
+    async def process_one(i: int, md_path: Path) -> None:
         output_path = output_dir / f"{md_path.stem}.json"
         
         # Skip if already processed
         if output_path.exists():
             results['skipped'].append(md_path.name)
-            continue
-        
-        print(f"[{i}/{total}] Processing: {md_path.name}")
-        
-        result = process_single_file(md_path, output_path, client, model)
+            return
         
+        async with semaphore:
+            # Rate limiting
+            await pacer.wait()
+            print(f"[{i}/{total}] Processing: {md_path.name}")
+            result = await process_single_file_async(
+                md_path, output_path, client, model, cached_content=cache_name
+            )
+        record(md_path, result)
+    
+    def record(md_path: Path, result: dict) -> None:
         if result['status'] == 'success':
             results['success'].append(result)
-            print(f"  ✓ Extracted: {result['crops']} crops, {result['weeds']} weeds, {result['entries']} entries")
+            print(f"  ✓ {md_path.name}: {result['crops']} crops, {result['weeds']} weeds, {result['entries']} entries")
         elif result['status'] == 'skipped':
             results['skipped'].append(result)
-            print(f"  ○ Skipped: {result.get('reason', 'unknown')}")
+            print(f"  ○ Skipped {md_path.name}: {result.get('reason', 'unknown')}")
         elif result['status'] == 'timeout':
             results['timeout'].append(result)
-            print(f"  ⏱ Timeout: {result.get('error', 'API too slow')}")
+            print(f"  ⏱ Timeout {md_path.name}: {result.get('error', 'API too slow')}")
         else:
             results['error'].append(result)
-            print(f"  ✗ Error: {result.get('error', 'unknown')}")
+            print(f"  ✗ Error {md_path.name}: {result.get('error', 'unknown')}")
+    
+    cache_name = await create_prompt_cache(client, model) if use_prompt_cache and md_files else None
+    try:
+        await asyncio.gather(*(process_one(i, md_path) for i, md_path in enumerate(md_files, 1)))
         
-        # Rate limiting
-        if i < total:
-            time.sleep(delay)
+        # Retry timeouts sequentially with a longer timeout instead of
+        # leaving them for a second run over the directory
+        retry_queue = results['timeout'] if timeout_retries else []
+        if retry_queue:
+            results['timeout'] = []
+        for timed_out in retry_queue:
+            md_path = input_dir / timed_out['file']
+            print(f"Retrying timeout: {md_path.name}")
+            retrying = AsyncRetrying(
+                # The first attempt is immediate; each later one follows a wait
+                stop=stop_after_attempt(timeout_retries + 1),
+                wait=wait_exponential(multiplier=30),
+                retry=retry_if_result(lambda result: result['status'] == 'timeout'),
+                retry_error_callback=lambda state: state.outcome.result(),
+            )
+            result = await retrying(
+                process_single_file_async,
+                md_path, output_dir / f"{md_path.stem}.json", client, model,
+                cached_content=cache_name, timeout_seconds=RETRY_TIMEOUT_SECONDS
+            )
+            record(md_path, result)
+    finally:
+        await delete_prompt_cache(client, cache_name)
     
     # Summary
     summary = {
@@ -303,7 +606,169 @@ def process_directory(
     
     # Save summary
     summary_path = output_dir / '_extraction_summary.json'
-    summary_path.write_text(json.dumps(summary, indent=2))
+    summary_path.write_bytes(orjson.dumps(summary, option=orjson.OPT_INDENT_2))
+    
+    return summary
+
+
+# Batch API job states that mean the job will make no further progress
+BATCH_DONE_STATES = {
+    'JOB_STATE_SUCCEEDED',
+    'JOB_STATE_PARTIALLY_SUCCEEDED',
+    'JOB_STATE_FAILED',
+    'JOB_STATE_CANCELLED',
+    'JOB_STATE_EXPIRED',
+}
+
+
+def _batch_request_line(key: str, content: str) -> bytes:
+    """One Batch API JSONL request: prompt + truncated markdown, structured output."""
+    return orjson.dumps({
+        'key': key,
+        'request': {
+            'contents': [{'role': 'user', 'parts': [{'text': _request_text(content, EXTRACTION_PROMPT)}]}],
+            'generation_config': {
+                'response_mime_type': 'application/json',
+                'response_json_schema': HerbicideLabel.model_json_schema(),
+                'temperature': 0.1,
+            },
+        },
+    }) + b'\n'
+
+
+def _batch_response_label(response: dict) -> HerbicideLabel:
+    """Validate the JSON text of a Batch API response against the schema."""
+    parts = response['candidates'][0]['content']['parts']
+    text = ''.join(part.get('text', '') for part in parts)
+    return HerbicideLabel.model_validate_json(text)
+
+
+def process_directory_batch(
+    input_dir: Path,
+    output_dir: Path,
+    model: str = "gemini-2.5-flash-lite",
+    limit: int = None,
+    poll_interval: float = 30.0
+) -> dict:
+    """
+    Process all markdown files in a directory as one Gemini Batch API job.
+    
+    Requests are written to a JSONL file, uploaded and submitted together;
+    the job is polled until it finishes and each response is written to
+    its own JSON file. Batch jobs trade latency (minutes to hours) for
+    higher throughput and lower cost than per-file calls.
+    
+    Args:
+        input_dir: Directory containing .md files
+        output_dir: Directory for JSON output
+        model: Gemini model to use
+        limit: Maximum files to process (None = all)
+        poll_interval: Seconds between job status checks
+    
+    Returns:
+        Summary statistics
+    """
+    input_dir = Path(input_dir)
+    output_dir = Path(output_dir)
+    _ensure_dir(output_dir)
+    
+    md_files = list_markdown_inputs(input_dir)
+    
+    if limit:
+        md_files = md_files[:limit]
+    
+    results = {
+        'success': [],
+        'error': [],
+        'skipped': [],
+        'timeout': []
+    }
+    
+    # Build the request file; keys map responses back to their source file
+    pending = {}
+    requests_path = output_dir / '_batch_requests.jsonl'
+    with requests_path.open('wb') as f:
+        for md_path in md_files:
+            if (output_dir / f"{md_path.stem}.json").exists():
+                results['skipped'].append(md_path.name)
+                continue
+            content = md_path.read_text(encoding='utf-8')
+            if _is_too_short(content):
+                results['skipped'].append({
+                    'status': 'skipped',
+                    'reason': 'content too short',
+                    'file': md_path.name
+                })
+                continue
+            key = str(len(pending))
+            pending[key] = md_path
+            f.write(_batch_request_line(key, content))
+    
+    if pending:
+        client = get_client()
+        uploaded = client.files.upload(
+            file=str(requests_path),
+            config=types.UploadFileConfig(display_name=requests_path.name, mime_type='jsonl')
+        )
+        job = client.batches.create(
+            model=model,
+            src=uploaded.name,
+            config=types.CreateBatchJobConfig(display_name=f"extract-{input_dir.name}")
+        )
+        print(f"Submitted batch job {job.name} with {len(pending)} requests")
+        
+        while job.state.name not in BATCH_DONE_STATES:
+            time.sleep(poll_interval)
+            job = client.batches.get(name=job.name)
+            print(f"  {job.state.name}")
+        
+        output_file = job.dest.file_name if job.dest else None
+        if output_file:
+            for line in client.files.download(file=output_file).splitlines():
+                if not line.strip():
+                    continue
+                record = orjson.loads(line)
+                md_path = pending.pop(record.get('key'), None)
+                if md_path is None:
+                    continue
+                try:
+                    if 'error' in record:
+                        raise RuntimeError(str(record['error']))
+                    label = _batch_response_label(record['response'])
+                    output_path = output_dir / f"{md_path.stem}.json"
+                    results['success'].append(_save_extraction(output_path, label, md_path, model))
+                except Exception as e:
+                    results['error'].append({'status': 'error', 'file': md_path.name, 'error': str(e)})
+        
+        # Anything without a response (failed/expired job) is an error
+        for md_path in pending.values():
+            results['error'].append({
+                'status': 'error',
+                'file': md_path.name,
+                'error': f"no batch response (job state {job.state.name})"
+            })
+        
+        try:
+            client.files.delete(name=uploaded.name)
+        except Exception:
+            pass
+    
+    requests_path.unlink(missing_ok=True)
+    
+    summary = {
+        'timestamp': datetime.now().isoformat(),
+        'total_files': len(md_files),
+        'succeeded': len(results['success']),
+        'errors': len(results['error']),
+        'timeouts': len(results['timeout']),
+        'skipped': len(results['skipped']),
+        'model': model,
+        'error_details': results['error'],
+        'timeout_files': []
+    }
+    
+    summary_path = output_dir / '_extraction_summary.json'
+    summary_path.write_bytes(orjson.dumps(summary, option=orjson.OPT_INDENT_2))
     
     return summary
 
@@ -342,6 +807,33 @@ def main():
         default=None,
         help='Maximum files to process (default: all)'
     )
+    parser.add_argument(
+        '--max-concurrent',
+        type=int,
+        default=8,
+        help='Maximum concurrent API calls for directories (default: 8)'
+    )
+    parser.add_argument(
+        '--skip-existing',
+        action='store_true',
+        help='For a single file, do nothing if the output JSON already exists'
+    )
+    parser.add_argument(
+        '--prompt-cache',
+        action='store_true',
+        help='Try caching the extraction prompt (only used once it reaches the model minimum cache size)'
+    )
+    parser.add_argument(
+        '--timeout-retries',
+        type=int,
+        default=3,
+        help='Backed-off retries (30s, 60s, 120s, ...) for timed-out files after an immediate retry (default: 3, 0 = no retry pass)'
+    )
+    parser.add_argument(
+        '--batch',
+        action='store_true',
+        help='Submit a directory as one Gemini Batch API job (slower turnaround, lower cost)'
+    )
     
     args = parser.parse_args()
     
@@ -351,7 +843,9 @@ def main():
         client = get_client()
         
         print(f"Processing: {args.input}")
-        result = process_single_file(args.input, output, client, args.model)
+        result = process_single_file(
+            args.input, output, client, args.model, skip_existing=args.skip_existing
+        )
         
         if result['status'] == 'success':
             print(f"\n✓ Success!")
@@ -369,17 +863,29 @@ def main():
         print(f"Output directory: {output_dir}")
         print(f"Model: {args.model}")
         print(f"Delay: {args.delay}s")
+        print(f"Max concurrent: {args.max_concurrent}")
         if args.limit:
             print(f"Limit: {args.limit} files")
         print()
         
-        summary = process_directory(
-            args.input,
-            output_dir,
-            model=args.model,
-            delay=args.delay,
-            limit=args.limit
-        )
+        if args.batch:
+            summary = process_directory_batch(
+                args.input,
+                output_dir,
+                model=args.model,
+                limit=args.limit
+            )
+        else:
+            summary = asyncio.run(process_directory(
+                args.input,
+                output_dir,
+                model=args.model,
+                delay=args.delay,
+                limit=args.limit,
+                max_concurrent=args.max_concurrent,
+                use_prompt_cache=args.prompt_cache,
+                timeout_retries=args.timeout_retries
+            ))
         
         print(f"\n{'='*50}")
         print(f"EXTRACTION COMPLETE")
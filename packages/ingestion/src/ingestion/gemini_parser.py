@@ -4,25 +4,26 @@ Graph-optimized Gemini parser for herbicide label PDFs.
 Extracts structured, graph-ready data (crops, weeds, constraints, rates) for Neo4j/GraphRAG.
 """
 
-import json
 import asyncio
+import contextlib
+import hashlib
+import io
 import time
 import os
+import random
+import re
+import threading
+from collections import deque
 from pathlib import Path
 from typing import Optional, Literal, List
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from pydantic import BaseModel, Field
+import orjson
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
 from dotenv import load_dotenv
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
 from google import genai
-from google.genai import types
-from google.api_core.exceptions import ResourceExhausted, ServiceUnavailable, InternalServerError
-
-
-# Load environment variables
-load_dotenv(dotenv_path=Path(__file__).parent.parent.parent / '.env')
+from google.genai import errors, types
 
 
 # ==========================================
@@ -31,6 +32,10 @@ load_dotenv(dotenv_path=Path(__file__).parent.parent.parent / '.env')
 
 StateEnum = Literal['NSW', 'VIC', 'QLD', 'SA', 'WA', 'TAS', 'NT', 'ACT', 'All States']
 ConstraintType = Literal['Weather', 'Timing', 'Equipment', 'TankMix', 'Safety', 'Rate', 'Soil']
+# 'other' keeps unlisted units out of the closed set; the label text stays in rate_full_text
+RateUnit = Literal['L/ha', 'mL/ha', 'g/ha', 'kg/ha', 'L/100 L', 'mL/100 L', 'g/100 L', 'kg/100 L', 'other']
+MoALetter = Literal['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K', 'L', 'M',
+                    'N', 'O', 'P', 'Q', 'R', 'S', 'T', 'U', 'V', 'W', 'X', 'Y', 'Z']
 
 
 class Constraint(BaseModel):
@@ -49,7 +54,7 @@ class WeedControlEdge(BaseModel):
     states: List[StateEnum] = Field(description="States where this use is registered")
 
     rate_value: float = Field(description="Numeric rate value (use max if range)")
-    rate_unit: str = Field(description="Rate unit (e.g., L/ha, mL/ha, g/ha)")
+    rate_unit: RateUnit = Field(description="Rate unit (per hectare, or per 100 L for spot spraying); 'other' if the label uses another unit")
     rate_full_text: str = Field(description="Original rate text")
 
     growth_stage_weed: Optional[str] = Field(default=None, description="Max weed size/stage")
@@ -57,32 +62,118 @@ class WeedControlEdge(BaseModel):
     constraints: List[Constraint] = Field(default_factory=list, description="Structured constraints")
 
 
-class HerbicideLabel(BaseModel):
-    """Root node container for graph ingestion."""
+class HerbicideHeader(BaseModel):
+    """Product identification and entity lists (first extraction call)."""
 
     product_name: str
     apvma_number: str
     active_constituents: List[str]
     moa_number: Optional[str] = Field(default=None, description="HRAC global numeric MoA code (preferred)")
-    moa_legacy_letter: Optional[str] = Field(default=None, description="Legacy MoA letter (for transition)")
+    moa_legacy_letter: Optional[MoALetter] = Field(default=None, description="Legacy MoA letter (for transition)")
 
     identified_crops: List[str] = Field(description="Unique crops mentioned")
     identified_weeds: List[str] = Field(description="Unique weeds mentioned")
 
+
+class HerbicideScenarios(BaseModel):
+    """Directions for Use edges only (second extraction call)."""
+
     usage_scenarios: List[WeedControlEdge] = Field(description="Edges Crop->Weed with rate/constraints")
 
 
+class HerbicideLabel(HerbicideHeader):
+    """Root node container for graph ingestion."""
+
+    usage_scenarios: List[WeedControlEdge] = Field(description="Edges Crop->Weed with rate/constraints")
+
+
+# Built once: the JSON schemas sent with requests and the validators for responses
+_HL_SCHEMA = HerbicideLabel.model_json_schema()
+_HL_ADAPTER = TypeAdapter(HerbicideLabel)
+_HEADER_SCHEMA = HerbicideHeader.model_json_schema()
+_HEADER_ADAPTER = TypeAdapter(HerbicideHeader)
+_SCENARIOS_SCHEMA = HerbicideScenarios.model_json_schema()
+_SCENARIOS_ADAPTER = TypeAdapter(HerbicideScenarios)
+
+
+def _label_data(text, adapter: TypeAdapter = _HL_ADAPTER) -> dict:
+    """Validate a JSON response and dump it without None/default fields.
+
+    Falls back to the raw JSON if it does not validate.
+    """
+    try:
+        label = adapter.validate_json(text)
+    except ValidationError:
+        return orjson.loads(text)
+    # One pydantic-core serializer call covers the label and every nested
+    # edge/constraint; no per-scenario Python dumping
+    return adapter.dump_python(label, exclude_defaults=True, exclude_none=True)
+
+
 # ==========================================
 # 2. GEMINI CLIENT & PROMPT
 # ==========================================
 
 
-def get_client() -> genai.Client:
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        raise ValueError("GEMINI_API_KEY not found in environment variables")
-    return genai.Client(api_key=api_key.strip().strip('"'))
+# HTTP timeout for pooled connections (milliseconds)
+CLIENT_TIMEOUT_MS = 180_000
+
+_CLIENT: Optional[genai.Client] = None
+_CLIENTS: Optional[List[genai.Client]] = None
+_CLIENT_LOCK = threading.Lock()
+_DOTENV_LOADED = False
+
 
+def _load_dotenv() -> None:
+    """Read the package .env once, on first client creation rather than at import."""
+    global _DOTENV_LOADED
+    if _DOTENV_LOADED:
+        return
+    _DOTENV_LOADED = True
+    load_dotenv(dotenv_path=Path(__file__).parent.parent.parent / '.env')
+
+
+def _new_client(api_key: str) -> genai.Client:
+    return genai.Client(
+        api_key=api_key.strip().strip('"'),
+        http_options=types.HttpOptions(timeout=CLIENT_TIMEOUT_MS),
+    )
+
+
+def get_client() -> genai.Client:
+    """Return the process-wide client so repeated calls share one connection pool."""
+    global _CLIENT
+    if _CLIENT is None:
+        with _CLIENT_LOCK:
+            if _CLIENT is None:
+                _load_dotenv()
+                api_key = os.getenv("GEMINI_API_KEY")
+                if not api_key:
+                    raise ValueError("GEMINI_API_KEY not found in environment variables")
+                _CLIENT = _new_client(api_key)
+    return _CLIENT
+
+
+def get_clients() -> List[genai.Client]:
+    """Return one client per key in GEMINI_API_KEYS (comma-separated).
+
+    Quotas are enforced per project, so each key adds its own RPM/TPM budget.
+    Falls back to the single GEMINI_API_KEY client.
+    """
+    global _CLIENTS
+    if _CLIENTS is None:
+        _load_dotenv()
+        keys = [k for k in os.getenv("GEMINI_API_KEYS", "").split(',') if k.strip()]
+        if not keys:
+            return [get_client()]
+        with _CLIENT_LOCK:
+            if _CLIENTS is None:
+                _CLIENTS = [_new_client(key) for key in keys]
+    return _CLIENTS
+
+
+# Bump when GRAPH_EXTRACTION_PROMPT or the schema changes; invalidates cached responses
+PROMPT_VERSION = "graph-v3"
 
 GRAPH_EXTRACTION_PROMPT = """
 You are a Data Engineer converting Herbicide Labels into a Knowledge Graph.
@@ -93,6 +184,8 @@ CRITICAL RULES FOR GRAPH DATA:
 1) Row Expansion: If a crop header covers multiple weed rows, repeat the crop for every weed row.
 2) Entity Normalization: Split lists (e.g., "Wheat, Barley, Oats") into separate entries; standardize names ("Wheat (Spring)" -> "Wheat").
 3) Rate Parsing: Split "1.5 L/ha" into value=1.5 and unit="L/ha". If a range is present ("1.0 - 1.5 L/ha"), use the MAX value.
+   Units must be one of L/ha, mL/ha, g/ha, kg/ha, L/100 L, mL/100 L, g/100 L, kg/100 L. Only normalize spelling (e.g., "mL per hectare" -> "mL/ha", "g/100L" -> "g/100 L").
+   Never convert between units or rescale the value: for any other unit (e.g., "g/L", "mL/100 m²") use unit="other" and keep the label's rate text in rate_full_text.
 4) Constraint Extraction: Do NOT dump critical comments. Break into atomic constraints with types: Weather, Timing, Equipment, TankMix, Safety, Rate, Soil.
    Example: "Apply at 3-leaf stage. Do not spray if rain is likely." ->
    Constraint(type="Timing", description="Apply at 3-leaf stage")
@@ -109,130 +202,780 @@ Return the JSON adhering strictly to the provided schema. Temperature = 0.0 for
 # ==========================================
 
 
-@retry(
-    stop=stop_after_attempt(5),
-    wait=wait_exponential(multiplier=2, min=4, max=60),
-    retry=retry_if_exception_type((ResourceExhausted, ServiceUnavailable, InternalServerError))
-)
-def generate_with_retry(client, model, contents, config):
-    return client.models.generate_content(
-        model=model,
-        contents=contents,
-        config=config,
-    )
+RETRY_ATTEMPTS = 5
+# google-genai raises errors.APIError subclasses carrying the HTTP status:
+# rate limited, internal error, unavailable
+RETRYABLE_STATUS = frozenset({429, 500, 503})
+
+
+async def generate_with_retry(client, model, contents, config):
+    """generate_content in a worker thread, retried with jittered backoff.
+
+    The backoff sleeps on the event loop, so a rate-limited request does not
+    hold a thread while it waits; jitter keeps concurrent PDFs from retrying
+    in lockstep.
+    """
+    for attempt in range(RETRY_ATTEMPTS):
+        try:
+            return await asyncio.to_thread(
+                client.models.generate_content,
+                model=model,
+                contents=contents,
+                config=config,
+            )
+        except errors.APIError as e:
+            if e.code not in RETRYABLE_STATUS or attempt == RETRY_ATTEMPTS - 1:
+                raise
+            await asyncio.sleep(min(60, 4 * 2 ** attempt) + random.uniform(0, 1))
+
+
+# ==========================================
+# 4. RATE LIMITING (RPM + TPM)
+# ==========================================
+
+
+class GeminiRateLimiter:
+    """Sliding one-minute windows over requests and tokens.
+
+    acquire() waits until one more request of the estimated size fits within
+    `headroom` of both limits, so requests start as fast as the quota allows
+    instead of at a fixed spacing.
+    """
+
+    def __init__(self, rpm: int, tpm: int, headroom: float = 0.8):
+        self.max_requests = max(1, int(rpm * headroom))
+        self.max_tokens = max(1, int(tpm * headroom))
+        self.window: deque = deque()  # (start time, requests, tokens)
+        self.window_requests = 0
+        self.window_tokens = 0
+        self.lock = asyncio.Lock()
+        # Minimum spacing between request starts; raised by TimeoutBreaker
+        self.min_interval = 0.0
+        self.last_start = float('-inf')
+
+    async def acquire(self, estimated_tokens: int, requests: int = 1) -> None:
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                spacing = self.last_start + self.min_interval - now
+                if spacing > 0:
+                    await asyncio.sleep(spacing)
+                    continue
+                while self.window and now - self.window[0][0] >= 60:
+                    _, expired_requests, expired_tokens = self.window.popleft()
+                    self.window_requests -= expired_requests
+                    self.window_tokens -= expired_tokens
+                fits = (
+                    self.window_requests + requests <= self.max_requests
+                    and self.window_tokens + estimated_tokens <= self.max_tokens
+                )
+                # An oversized request still goes through once the window is empty
+                if fits or not self.window:
+                    self.window.append((now, requests, estimated_tokens))
+                    self.window_requests += requests
+                    self.window_tokens += estimated_tokens
+                    self.last_start = now
+                    return
+                await asyncio.sleep(60 - (now - self.window[0][0]))
+
+
+class TimeoutBreaker:
+    """Circuit breaker on consecutive per-file timeouts.
+
+    Once `threshold` files in a row time out, the breaker trips: the limiter
+    spaces the remaining request starts `pause` seconds apart and admit()
+    lets one file at a time through, so slow calls cannot pile up behind a
+    slow API. The limiter is where queued files wait, so they all see the
+    change. After `recovery` successes in a row the breaker resets and the
+    run returns to full speed.
+    """
+
+    def __init__(self, limiter: GeminiRateLimiter, threshold: int = 3, pause: float = 30.0, recovery: int = 5):
+        self.limiter = limiter
+        self.threshold = threshold
+        self.pause = pause
+        self.recovery = recovery
+        self.consecutive = 0
+        self.successes = 0
+        self.tripped = False
+        # While tripped, files in progress hold this single slot
+        self.gate = asyncio.Semaphore(1)
+
+    @contextlib.asynccontextmanager
+    async def admit(self):
+        if not self.tripped:
+            yield
+            return
+        async with self.gate:
+            yield
+
+    def record(self, timed_out: bool) -> None:
+        if not timed_out:
+            self.consecutive = 0
+            if self.tripped:
+                self.successes += 1
+                if self.successes >= self.recovery:
+                    self.tripped = False
+                    self.limiter.min_interval = 0.0
+                    print(f"  ✓ {self.successes} files in a row succeeded; back to full speed")
+            return
+        self.successes = 0
+        self.consecutive += 1
+        if self.consecutive >= self.threshold and not self.tripped:
+            self.tripped = True
+            self.limiter.min_interval = self.pause
+            print(f"  ⚠️ {self.consecutive} consecutive timeouts; running one file at a time, every {self.pause:.0f}s")
+
+
+# PDFs in progress per API key in parse_all_pdfs; bounds memory, not throughput
+DEFAULT_MAX_CONCURRENT = 32
+
+# Gemini bills each PDF page as a fixed number of tokens
+PDF_TOKENS_PER_PAGE = 258
+PDF_PAGE_RE = re.compile(rb'/Type\s*/Page\b')
+
+
+def estimate_tokens(pdf_bytes: bytes) -> int:
+    """Rough input tokens for a PDF plus the prompt, for rate limiting."""
+    # Page objects inside compressed object streams are not visible; fall back to size
+    pages = len(PDF_PAGE_RE.findall(pdf_bytes)) or max(1, len(pdf_bytes) // 100_000)
+    return pages * PDF_TOKENS_PER_PAGE + len(GRAPH_EXTRACTION_PROMPT) // 4
 
 
 # ==========================================
-# 4. PARSING LOGIC
+# 5. CONTEXT CACHE (uploaded PDF + prompt)
 # ==========================================
 
+DATA_DIR = Path(__file__).parent.parent.parent.parent.parent / 'data'
+CACHE_INDEX_PATH = DATA_DIR / 'gemini_cache_index.json'
+CACHE_TTL_SECONDS = 3600
+
+# Request text when the PDF and the extraction prompt come from the cache
+CACHED_REQUEST = "Extract the herbicide label in the cached PDF following the instructions."
+
+# Each PDF is extracted in two smaller structured calls that run concurrently
+HEADER_REQUEST = "Return only the product identification fields and the unique crops and weeds."
+SCENARIOS_REQUEST = "Return only usage_scenarios: one edge per crop and weed row of the Directions for Use table."
+
+_cache_index: Optional[dict] = None
+# create_pdf_cache runs in worker threads; guards index updates and writes
+_cache_index_lock = threading.Lock()
+
+
+def load_cache_index() -> dict:
+    """Load {sha256: {cache_name, model, expires_at}} for cached PDFs."""
+    global _cache_index
+    if _cache_index is None:
+        try:
+            _cache_index = orjson.loads(CACHE_INDEX_PATH.read_bytes())
+        except (OSError, ValueError):
+            _cache_index = {}
+    return _cache_index
+
+
+def save_cache_index() -> None:
+    CACHE_INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
+    CACHE_INDEX_PATH.write_bytes(orjson.dumps(load_cache_index(), option=orjson.OPT_INDENT_2))
+
+
+def lookup_pdf_cache(content_hash: str, model: str) -> Optional[str]:
+    """Return a live cache name for this PDF and model, if one is recorded."""
+    entry = load_cache_index().get(content_hash)
+    if entry and entry['model'] == model and entry['expires_at'] > datetime.now().isoformat():
+        return entry['cache_name']
+    return None
+
+
+def create_pdf_cache(client: genai.Client, uploaded_file, content_hash: str, model: str) -> Optional[str]:
+    """Cache an uploaded PDF with the extraction prompt as system instruction.
+
+    Returns None when caching is not possible (e.g. the document is below the
+    model's minimum cacheable token count); callers then send the prompt inline.
+    """
+    try:
+        cache = client.caches.create(
+            model=model,
+            config=types.CreateCachedContentConfig(
+                contents=[uploaded_file],
+                system_instruction=GRAPH_EXTRACTION_PROMPT,
+                ttl=f"{CACHE_TTL_SECONDS}s",
+            ),
+        )
+    except Exception as e:
+        print(f"  ⚠️ Context cache unavailable ({e}); sending prompt inline")
+        return None
+
+    # Expire the index entry a minute early so a lookup never races the TTL
+    expires_at = datetime.now() + timedelta(seconds=CACHE_TTL_SECONDS - 60)
+    with _cache_index_lock:
+        load_cache_index()[content_hash] = {
+            'cache_name': cache.name,
+            'model': model,
+            'expires_at': expires_at.isoformat(),
+        }
+        save_cache_index()
+    return cache.name
+
+
+def forget_pdf_cache(content_hash: str) -> None:
+    with _cache_index_lock:
+        if load_cache_index().pop(content_hash, None) is not None:
+            save_cache_index()
+
+
+# Extraction results by PDF content hash and prompt version
+LLM_CACHE_DIR = DATA_DIR / 'llm_cache'
+RESPONSE_CACHE_TTL = timedelta(days=7)
+
+
+def _response_cache_path(content_hash: str) -> Path:
+    return LLM_CACHE_DIR / f"{content_hash}_{PROMPT_VERSION}.json"
+
+
+def load_cached_response(content_hash: str, model: str) -> Optional[dict]:
+    """Return a cached extraction for this PDF and model if still within its TTL."""
+    try:
+        entry = orjson.loads(_response_cache_path(content_hash).read_bytes())
+    except (OSError, ValueError):
+        return None
+    if entry.get('model') != model or entry.get('expires_at', '') <= datetime.now().isoformat():
+        return None
+    return entry['response']
+
+
+def _cacheable(data: dict) -> bool:
+    """Only complete extractions are cached: schema-valid with usage scenarios.
+
+    Raw-JSON fallbacks and empty extractions are retried on the next run
+    instead of being served again for RESPONSE_CACHE_TTL.
+    """
+    if not data.get('usage_scenarios'):
+        return False
+    try:
+        _HL_ADAPTER.validate_python(data)
+    except ValidationError:
+        return False
+    return True
+
+
+def save_cached_response(content_hash: str, model: str, data: dict) -> None:
+    if not _cacheable(data):
+        return
+    created_at = datetime.now()
+    LLM_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    _response_cache_path(content_hash).write_bytes(orjson.dumps({
+        'response': data,
+        'model': model,
+        'created_at': created_at.isoformat(),
+        'expires_at': (created_at + RESPONSE_CACHE_TTL).isoformat(),
+    }))
+
+
+# Re-rendered (downsampled) PDFs by content hash and DPI
+PDF_COMPRESSED_DIR = DATA_DIR / 'pdf_compressed'
+DOWNSAMPLE_MIN_BYTES = 2 * 1024 * 1024
+DOWNSAMPLE_JPEG_QUALITY = 75
+
+
+def downsample_pdf(pdf_bytes: bytes, content_hash: str, dpi: int) -> bytes:
+    """Re-render a large PDF as JPEG pages at `dpi` to cut upload size and tokens.
+
+    Only PDFs over DOWNSAMPLE_MIN_BYTES are touched (image-heavy scans).
+    Results are cached under PDF_COMPRESSED_DIR; the original bytes are
+    returned if rendering fails or does not make the file smaller.
+    """
+    if len(pdf_bytes) <= DOWNSAMPLE_MIN_BYTES:
+        return pdf_bytes
+
+    compressed_path = PDF_COMPRESSED_DIR / f"{content_hash}_{dpi}.pdf"
+    try:
+        return compressed_path.read_bytes()
+    except OSError:
+        pass
+
+    try:
+        # Imported here: only needed when downsampling is enabled
+        import pymupdf
+
+        with pymupdf.open(stream=pdf_bytes, filetype='pdf') as src, pymupdf.open() as dst:
+            for page in src:
+                image = page.get_pixmap(dpi=dpi).tobytes('jpeg', jpg_quality=DOWNSAMPLE_JPEG_QUALITY)
+                new_page = dst.new_page(width=page.rect.width, height=page.rect.height)
+                new_page.insert_image(new_page.rect, stream=image)
+            compressed = dst.tobytes(garbage=3, deflate=True)
+    except Exception as e:
+        print(f"  ⚠️ Downsampling failed, uploading original: {e}")
+        return pdf_bytes
+
+    if len(compressed) >= len(pdf_bytes):
+        return pdf_bytes
+
+    PDF_COMPRESSED_DIR.mkdir(parents=True, exist_ok=True)
+    compressed_path.write_bytes(compressed)
+    return compressed
+
+
+# ==========================================
+# 6. PARSING LOGIC
+# ==========================================
+
+
+async def _generate_graph_data(
+    pdf_path: Path,
+    client: genai.Client,
+    model: str,
+    contents: list,
+    cached_content: Optional[str] = None
+) -> dict:
+    def config(schema: dict) -> types.GenerateContentConfig:
+        return types.GenerateContentConfig(
+            response_mime_type='application/json',
+            response_json_schema=schema,
+            temperature=0.0,
+            cached_content=cached_content,
+        )
+
+    # Two small schemas decode faster and fail less often than one deep schema;
+    # the calls share the uploaded/cached PDF and run concurrently
+    header_response, scenarios_response = await asyncio.gather(
+        generate_with_retry(client, model, [*contents, HEADER_REQUEST], config(_HEADER_SCHEMA)),
+        generate_with_retry(client, model, [*contents, SCENARIOS_REQUEST], config(_SCENARIOS_SCHEMA)),
+    )
+
+    # Parse and validate each JSON text in one pydantic-core call, then merge
+    data = _label_data(header_response.text, _HEADER_ADAPTER)
+    data.update(_label_data(scenarios_response.text, _SCENARIOS_ADAPTER))
+
+    if not data.get('usage_scenarios'):
+        print(f"  ⚠️ No usage_scenarios extracted for {pdf_path.name}")
+
+    return data
+
 
 async def parse_pdf_graph_ready(
     pdf_path: Path,
     client: genai.Client,
-    model: str = "gemini-2.5-flash"
+    model: str = "gemini-2.5-flash",
+    limiter: Optional[GeminiRateLimiter] = None,
+    downsample_dpi: Optional[int] = None,
+    timeout: Optional[float] = None,
+    content_hash: Optional[str] = None
 ) -> dict:
-    """Upload PDF, extract graph-ready JSON, and clean up the uploaded file."""
+    """Extract graph-ready JSON from a PDF.
+
+    Results are cached by PDF content hash and PROMPT_VERSION under
+    LLM_CACHE_DIR, so unchanged PDFs are not re-parsed for RESPONSE_CACHE_TTL,
+    whatever the output directory. A limiter, if given, paces the API calls.
+    With downsample_dpi, large PDFs are re-rendered at that DPI before upload.
+    timeout bounds the API work only; time queued on the limiter is not
+    counted, so a long queue does not fail the files at its tail.
+    A caller that already hashed the file passes content_hash; the PDF is
+    then read only on a response-cache miss.
+    """
+
+    # Read once: the same bytes are hashed, sized and uploaded
+    pdf_bytes = None
+    if content_hash is None:
+        pdf_bytes = pdf_path.read_bytes()
+        content_hash = hashlib.sha256(pdf_bytes).hexdigest()
+
+    data = load_cached_response(content_hash, model)
+    if data is not None:
+        print(f"  ↺ Cached response for {pdf_path.name}")
+        return data
+
+    if pdf_bytes is None:
+        pdf_bytes = pdf_path.read_bytes()
+
+    if downsample_dpi:
+        pdf_bytes = await asyncio.to_thread(downsample_pdf, pdf_bytes, content_hash, downsample_dpi)
 
-    uploaded_file = client.files.upload(
-        file=str(pdf_path),
+    if limiter:
+        # Two calls per PDF, each sending the document
+        await limiter.acquire(2 * estimate_tokens(pdf_bytes), requests=2)
+
+    data = await asyncio.wait_for(
+        _parse_uncached(pdf_path, pdf_bytes, client, model, content_hash),
+        timeout=timeout,
+    )
+    save_cached_response(content_hash, model, data)
+    return data
+
+
+async def _parse_uncached(
+    pdf_path: Path,
+    pdf_bytes: bytes,
+    client: genai.Client,
+    model: str,
+    content_hash: str
+) -> dict:
+    """Call Gemini for a PDF.
+
+    Each PDF is uploaded and cached together with the prompt once; the cache
+    is recorded by content hash in CACHE_INDEX_PATH, so re-runs and retries
+    within the TTL reference it instead of re-uploading.
+    """
+
+    cache_name = lookup_pdf_cache(content_hash, model)
+    if cache_name:
+        try:
+            return await _generate_graph_data(pdf_path, client, model, [CACHED_REQUEST], cache_name)
+        except errors.ClientError as e:
+            # Cache deleted or expired server-side; upload again below.
+            # Anything else (e.g. a 429 that outlasted the retries) propagates
+            if e.code not in (403, 404):
+                raise
+            forget_pdf_cache(content_hash)
+
+    # The SDK's file and cache calls block; run them off the event loop so
+    # uploads for concurrent PDFs overlap
+    uploaded_file = await asyncio.to_thread(
+        client.files.upload,
+        file=io.BytesIO(pdf_bytes),
         config=types.UploadFileConfig(
             display_name=pdf_path.name,
             mime_type='application/pdf'
         )
     )
 
+    # Back off while the file is processing: large PDFs take 10-30s and each
+    # status check costs a request
+    delay = 0.5
     while uploaded_file.state == 'PROCESSING':
-        await asyncio.sleep(1)
-        uploaded_file = client.files.get(name=uploaded_file.name)
+        await asyncio.sleep(delay)
+        delay = min(delay * 1.7, 8.0)
+        uploaded_file = await asyncio.to_thread(client.files.get, name=uploaded_file.name)
 
     if uploaded_file.state != 'ACTIVE':
         raise RuntimeError(f"File upload failed with state: {uploaded_file.state}")
 
-    try:
-        response = await asyncio.to_thread(
-            generate_with_retry,
-            client,
-            model,
-            [uploaded_file, GRAPH_EXTRACTION_PROMPT],
-            types.GenerateContentConfig(
-                response_mime_type='application/json',
-                response_schema=HerbicideLabel,
-                temperature=0.0,
-            ),
-        )
-
-        if response.parsed:
-            data = response.parsed.model_dump()
-        else:
-            data = json.loads(response.text)
-
-        if not data.get('usage_scenarios'):
-            print(f"  ⚠️ No usage_scenarios extracted for {pdf_path.name}")
+    cache_name = await asyncio.to_thread(create_pdf_cache, client, uploaded_file, content_hash, model)
+    if cache_name:
+        # The cache holds the file's content; the upload expires on its own
+        return await _generate_graph_data(pdf_path, client, model, [CACHED_REQUEST], cache_name)
 
-        return data
+    try:
+        return await _generate_graph_data(pdf_path, client, model, [uploaded_file, GRAPH_EXTRACTION_PROMPT])
 
     finally:
         try:
-            client.files.delete(name=uploaded_file.name)
+            await asyncio.to_thread(client.files.delete, name=uploaded_file.name)
         except Exception:
             pass
 
 
+def list_pdfs(input_dir: Path) -> List[Path]:
+    """PDFs directly under input_dir, from a single scandir pass."""
+    with os.scandir(input_dir) as entries:
+        return [Path(entry.path) for entry in entries if entry.name.endswith('.pdf') and entry.is_file()]
+
+
+def existing_output_stems(output_dir: Path) -> set:
+    """Stems of the .json files already in output_dir, so skips need no per-file stat."""
+    with os.scandir(output_dir) as entries:
+        return {entry.name[:-len('.json')] for entry in entries if entry.name.endswith('.json')}
+
+
+class ProgressLog:
+    """Per-file outcomes appended to a JSONL file as each file finishes.
+
+    The log survives a crash or quota exhaustion mid-run; the final summary
+    is composed from it.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.file = path.open('wb')
+
+    def record(self, file_name: str, status: str, error: Optional[str] = None) -> None:
+        entry = {'file': file_name, 'status': status}
+        if error is not None:
+            entry['error'] = error
+        self.file.write(orjson.dumps(entry) + b'\n')
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+    def summarize(self) -> tuple:
+        """Return ({status: count}, [{file, error}, ...] for failures)."""
+        counts = {'succeeded': 0, 'failed': 0, 'skipped': 0}
+        failed = []
+        with self.path.open('rb') as f:
+            for line in f:
+                entry = orjson.loads(line)
+                counts[entry['status']] += 1
+                if entry['status'] == 'failed':
+                    failed.append({'file': entry['file'], 'error': entry['error']})
+        return counts, failed
+
+
+def _json_bytes(data, pretty: bool = False) -> bytes:
+    """Serialize output JSON; compact unless pretty (2-space indent) is asked for."""
+    return orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0)
+
+
 async def parse_all_pdfs(
     input_dir: Path,
     output_dir: Path,
     model: str = "gemini-2.5-flash",
-    max_concurrent: int = 2,
-    delay_between: float = 2.5
+    rpm: int = 150,
+    tpm: int = 1_000_000,
+    pretty: bool = False,
+    file_timeout: float = 180.0,
+    downsample_dpi: Optional[int] = None,
+    max_concurrent: int = DEFAULT_MAX_CONCURRENT
 ) -> dict:
-    """Process all PDFs in a directory with concurrency and backoff."""
+    """Process all PDFs in a directory, paced by an RPM/TPM rate limiter.
+
+    At most max_concurrent PDFs per API key are in progress (and in memory)
+    at a time; the limiter keeps requests within 80% of the rpm/tpm quota
+    for the model's tier. With several keys in
+    GEMINI_API_KEYS the PDFs are sharded across them, each key with its own
+    rpm/tpm limiter. PDFs with identical content
+    (reprints under another name) are parsed once and the result is written
+    for each of them. Each file gets at most file_timeout seconds of API
+    time once the limiter admits it; repeated timeouts trip a TimeoutBreaker
+    that runs one file at a time until files succeed again.
+    """
 
     input_dir = Path(input_dir)
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    pdf_files = list(input_dir.glob("*.pdf"))
-    client = get_client()
-
-    results = {
-        'succeeded': [],
-        'failed': [],
-        'skipped': []
-    }
-
-    semaphore = asyncio.Semaphore(max_concurrent)
-
-    async def process_one(pdf_path: Path) -> None:
-        output_path = output_dir / f"{pdf_path.stem}.json"
+    pdf_files = list_pdfs(input_dir)
+    existing = existing_output_stems(output_dir)
+    clients = get_clients()
+
+    progress = ProgressLog(output_dir / 'extraction_summary.jsonl')
+
+    # Group identical PDFs by content hash (streamed, nothing kept in memory)
+    duplicates = {}
+    for pdf_path in pdf_files:
+        if pdf_path.stem in existing:
+            progress.record(pdf_path.name, 'skipped')
+            continue
+        with pdf_path.open('rb') as f:
+            content_hash = hashlib.file_digest(f, 'sha256').hexdigest()
+        duplicates.setdefault(content_hash, []).append(pdf_path)
+
+    # rpm/tpm are per key: each client gets its own limiter, breaker and
+    # bound on PDFs in progress
+    limiters = [GeminiRateLimiter(rpm, tpm) for _ in clients]
+    breakers = [TimeoutBreaker(limiter) for limiter in limiters]
+    semaphores = [asyncio.Semaphore(max_concurrent) for _ in clients]
+
+    async def parse_with_timeout(pdf_path: Path, shard: int, content_hash: str) -> dict:
+        try:
+            async with breakers[shard].admit():
+                data = await parse_pdf_graph_ready(
+                    pdf_path, clients[shard], model, limiters[shard], downsample_dpi,
+                    timeout=file_timeout, content_hash=content_hash,
+                )
+        except asyncio.TimeoutError:
+            breakers[shard].record(timed_out=True)
+            raise TimeoutError(f"timed out after {file_timeout:.0f}s")
+        breakers[shard].record(timed_out=False)
+        return data
 
-        if output_path.exists():
-            results['skipped'].append(pdf_path.name)
+    async def process_one(content_hash: str, pdf_paths: List[Path]) -> None:
+        pdf_path = pdf_paths[0]
+        # Route by content hash so reruns hit the same key (and its context caches)
+        shard = int(content_hash[:8], 16) % len(clients)
+        try:
+            async with semaphores[shard]:
+                print(f"Processing: {pdf_path.name}")
+                data = await parse_with_timeout(pdf_path, shard, content_hash)
+        except Exception as e:
+            for path in pdf_paths:
+                print(f"  ✗ Error: {path.name} - {e}")
+                progress.record(path.name, 'failed', str(e))
             return
 
-        async with semaphore:
+        for path in pdf_paths:
+            output_path = output_dir / f"{path.stem}.json"
             try:
-                print(f"Processing: {pdf_path.name}")
-                data = await parse_pdf_graph_ready(pdf_path, client, model)
-
                 data['_meta'] = {
-                    'source_file': pdf_path.name,
+                    'source_file': path.name,
                     'parsed_at': datetime.now().isoformat(),
                     'model': model,
                 }
 
-                output_path.write_text(json.dumps(data, indent=2, ensure_ascii=False))
-                results['succeeded'].append(pdf_path.name)
+                output_path.write_bytes(_json_bytes(data, pretty))
+                progress.record(path.name, 'succeeded')
                 print(f"  ✓ Saved: {output_path.name}")
 
             except Exception as e:
-                print(f"  ✗ Error: {pdf_path.name} - {e}")
-                results['failed'].append({'file': pdf_path.name, 'error': str(e)})
+                print(f"  ✗ Error: {path.name} - {e}")
+                progress.record(path.name, 'failed', str(e))
+
+    tasks = [process_one(content_hash, pdf_paths) for content_hash, pdf_paths in duplicates.items()]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        progress.close()
+
+    counts, failed_files = progress.summarize()
+    summary = {
+        'timestamp': datetime.now().isoformat(),
+        'total_files': len(pdf_files),
+        'succeeded': counts['succeeded'],
+        'failed': counts['failed'],
+        'skipped': counts['skipped'],
+        'model': model,
+        'failed_files': failed_files,
+    }
+
+    (output_dir / 'extraction_summary.json').write_bytes(_json_bytes(summary, pretty))
+    return summary
+
+
+# Batch API job states that mean the job will make no further progress
+BATCH_DONE_STATES = {
+    'JOB_STATE_SUCCEEDED',
+    'JOB_STATE_PARTIALLY_SUCCEEDED',
+    'JOB_STATE_FAILED',
+    'JOB_STATE_CANCELLED',
+    'JOB_STATE_EXPIRED',
+}
+
+
+def parse_all_pdfs_batch(
+    input_dir: Path,
+    output_dir: Path,
+    model: str = "gemini-2.5-flash",
+    max_poll_interval: float = 60.0,
+    pretty: bool = False
+) -> dict:
+    """Process all PDFs in a directory as one Gemini Batch API job.
 
-            await asyncio.sleep(delay_between)
+    PDFs are uploaded once, one JSONL request per PDF is submitted, and the
+    job is polled with exponential backoff until it finishes. Batch jobs
+    run at half the per-token cost and are not subject to per-minute rate
+    limits, at the price of a longer turnaround.
+    """
 
-    tasks = [process_one(pdf) for pdf in pdf_files]
-    await asyncio.gather(*tasks)
+    input_dir = Path(input_dir)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    pdf_files = list_pdfs(input_dir)
+    existing = existing_output_stems(output_dir)
+    client = get_client()
+
+    results = {
+        'succeeded': [],
+        'failed': [],
+        'skipped': []
+    }
+
+    generation_config = {
+        'response_mime_type': 'application/json',
+        'response_json_schema': _HL_SCHEMA,
+        'temperature': 0.0,
+    }
+
+    pending = {}
+    uploaded_files = []
+    requests_path = output_dir / '_batch_requests.jsonl'
+    try:
+        with requests_path.open('wb') as f:
+            for pdf_path in pdf_files:
+                if pdf_path.stem in existing:
+                    results['skipped'].append(pdf_path.name)
+                    continue
+                print(f"Uploading: {pdf_path.name}")
+                uploaded_file = client.files.upload(
+                    file=str(pdf_path),
+                    config=types.UploadFileConfig(
+                        display_name=pdf_path.name,
+                        mime_type='application/pdf'
+                    )
+                )
+                uploaded_files.append(uploaded_file)
+                pending[pdf_path.stem] = pdf_path
+                f.write(orjson.dumps({
+                    'key': pdf_path.stem,
+                    'request': {
+                        'contents': [{
+                            'role': 'user',
+                            'parts': [
+                                {'file_data': {'file_uri': uploaded_file.uri, 'mime_type': 'application/pdf'}},
+                                {'text': GRAPH_EXTRACTION_PROMPT},
+                            ],
+                        }],
+                        'generation_config': generation_config,
+                    },
+                }) + b'\n')
+
+        if pending:
+            batch_input = client.files.upload(
+                file=str(requests_path),
+                config=types.UploadFileConfig(display_name=requests_path.name, mime_type='jsonl')
+            )
+            uploaded_files.append(batch_input)
+            job = client.batches.create(
+                model=model,
+                src=batch_input.name,
+                config=types.CreateBatchJobConfig(display_name=f"graph-{input_dir.name}")
+            )
+            print(f"Submitted batch job {job.name} with {len(pending)} PDFs")
+
+            poll_interval = 5.0
+            while job.state.name not in BATCH_DONE_STATES:
+                time.sleep(poll_interval)
+                poll_interval = min(poll_interval * 2, max_poll_interval)
+                job = client.batches.get(name=job.name)
+                print(f"  {job.state.name}")
+
+            output_file = job.dest.file_name if job.dest else None
+            if output_file:
+                for line in client.files.download(file=output_file).splitlines():
+                    if not line.strip():
+                        continue
+                    record = orjson.loads(line)
+                    pdf_path = pending.pop(record.get('key'), None)
+                    if pdf_path is None:
+                        continue
+                    try:
+                        if 'error' in record:
+                            raise RuntimeError(str(record['error']))
+                        parts = record['response']['candidates'][0]['content']['parts']
+                        text = ''.join(part.get('text', '') for part in parts)
+                        data = _label_data(text)
+
+                        if not data.get('usage_scenarios'):
+                            print(f"  ⚠️ No usage_scenarios extracted for {pdf_path.name}")
+
+                        data['_meta'] = {
+                            'source_file': pdf_path.name,
+                            'parsed_at': datetime.now().isoformat(),
+                            'model': model,
+                        }
+
+                        output_path = output_dir / f"{pdf_path.stem}.json"
+                        output_path.write_bytes(_json_bytes(data, pretty))
+                        results['succeeded'].append(pdf_path.name)
+                        print(f"  ✓ Saved: {output_path.name}")
+
+                    except Exception as e:
+                        print(f"  ✗ Error: {pdf_path.name} - {e}")
+                        results['failed'].append({'file': pdf_path.name, 'error': str(e)})
+
+            # PDFs without a response (failed/expired job)
+            for pdf_path in pending.values():
+                results['failed'].append({
+                    'file': pdf_path.name,
+                    'error': f"no batch response (job state {job.state.name})"
+                })
+
+    finally:
+        for uploaded_file in uploaded_files:
+            try:
+                client.files.delete(name=uploaded_file.name)
+            except Exception:
+                pass
+        requests_path.unlink(missing_ok=True)
 
     summary = {
         'timestamp': datetime.now().isoformat(),
@@ -244,14 +987,20 @@ async def parse_all_pdfs(
         'failed_files': results['failed'],
     }
 
-    (output_dir / 'extraction_summary.json').write_text(json.dumps(summary, indent=2))
+    (output_dir / 'extraction_summary.json').write_bytes(_json_bytes(summary, pretty))
     return summary
 
 
-def parse_single(pdf_path: str, output_path: str = None, model: str = "gemini-2.5-flash") -> dict:
+def parse_single(
+    pdf_path: str,
+    output_path: str = None,
+    model: str = "gemini-2.5-flash",
+    pretty: bool = False,
+    downsample_dpi: Optional[int] = None
+) -> dict:
     pdf_path = Path(pdf_path)
     client = get_client()
-    data = asyncio.run(parse_pdf_graph_ready(pdf_path, client, model))
+    data = asyncio.run(parse_pdf_graph_ready(pdf_path, client, model, downsample_dpi=downsample_dpi))
 
     data['_meta'] = {
         'source_file': pdf_path.name,
@@ -260,7 +1009,7 @@ def parse_single(pdf_path: str, output_path: str = None, model: str = "gemini-2.
     }
 
     if output_path:
-        Path(output_path).write_text(json.dumps(data, indent=2, ensure_ascii=False))
+        Path(output_path).write_bytes(_json_bytes(data, pretty))
 
     return data
 
@@ -272,27 +1021,46 @@ def main():
     parser.add_argument('input', type=Path, help='Input PDF file or directory')
     parser.add_argument('-o', '--output', type=Path, help='Output JSON file or directory')
     parser.add_argument('--model', default='gemini-2.5-flash', help='Gemini model to use (default: gemini-2.5-flash)')
-    parser.add_argument('--max-concurrent', type=int, default=2, help='Maximum concurrent requests (default: 2)')
-    parser.add_argument('--delay', type=float, default=2.5, help='Delay between requests in seconds (default: 2.5)')
+    parser.add_argument('--rpm', type=int, default=150, help='Requests per minute quota per API key for the model tier (default: 150)')
+    parser.add_argument('--tpm', type=int, default=1_000_000, help='Input tokens per minute quota per API key (default: 1000000)')
+    parser.add_argument('--batch', action='store_true', help='Submit a directory as one Gemini Batch API job (half cost, slower turnaround)')
+    parser.add_argument('--pretty', action='store_true', help='Indent output JSON (default: compact)')
+    parser.add_argument('--file-timeout', type=float, default=180.0, help='Seconds allowed per PDF before it is failed (default: 180)')
+    parser.add_argument('--downsample-dpi', type=int, help='Re-render PDFs over 2 MB at this DPI before upload (e.g. 150)')
+    parser.add_argument('--max-concurrent', type=int, default=DEFAULT_MAX_CONCURRENT,
+                        help=f'PDFs in progress per API key (default: {DEFAULT_MAX_CONCURRENT})')
 
     args = parser.parse_args()
 
     if args.input.is_file():
         output = args.output or args.input.with_suffix('.json')
         print(f"Parsing: {args.input}")
-        data = parse_single(str(args.input), str(output), model=args.model)
+        data = parse_single(
+            str(args.input),
+            str(output),
+            model=args.model,
+            pretty=args.pretty,
+            downsample_dpi=args.downsample_dpi,
+        )
         print(f"Output: {output}")
         print(f"Usage scenarios: {len(data.get('usage_scenarios', []))}")
     else:
         output_dir = args.output or args.input.parent / 'extracted'
         print(f"Processing directory: {args.input}")
-        summary = asyncio.run(parse_all_pdfs(
-            args.input,
-            output_dir,
-            model=args.model,
-            max_concurrent=args.max_concurrent,
-            delay_between=args.delay,
-        ))
+        if args.batch:
+            summary = parse_all_pdfs_batch(args.input, output_dir, model=args.model, pretty=args.pretty)
+        else:
+            summary = asyncio.run(parse_all_pdfs(
+                args.input,
+                output_dir,
+                model=args.model,
+                rpm=args.rpm,
+                tpm=args.tpm,
+                pretty=args.pretty,
+                file_timeout=args.file_timeout,
+                downsample_dpi=args.downsample_dpi,
+                max_concurrent=args.max_concurrent,
+            ))
         print("\nComplete!")
         print(f"Succeeded: {summary['succeeded']}")
         print(f"Failed: {summary['failed']}")
@@ -6,10 +6,12 @@ without requiring cloud API credits. Optimized for downstream knowledge graph ex
 """
 
 import os
-import json
+import mmap
 import re
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from tqdm import tqdm
+import orjson
 import pymupdf
 
 # Configuration
@@ -17,18 +19,101 @@ DATA_DIR = Path(__file__).parent.parent.parent.parent.parent / 'data'
 LABELS_DIR = DATA_DIR / 'labels'
 PARSED_DIR = DATA_DIR / 'parsed'
 METADATA_FILE = PARSED_DIR / 'parsing_metadata.json'
+# Metadata log records buffered between flushes during a batch run
+METADATA_FLUSH_EVERY = 25
+MAX_WORKERS = min(os.cpu_count() or 1, 8)
+_BAR = "=" * 60
+_YAML_ESCAPE = str.maketrans({'"': '\\"', '\n': ' '})
+
+# Precompiled once; called through bound methods on every page/document
+_WS_RE = re.compile(r'\n{3,}')
+_HYPHEN_RE = re.compile(r'(\w)-\n(\w)')
+_LABEL_RE = re.compile(r'Label Name:\s*\n?\s*(.+?)(?:\n|Signal)')
+_APVMA_RE = re.compile(r'(\d{4,6})\s*/\s*\d+')
+_ACTIVE_RE = re.compile(r'Active Constituent[s]?:\s*(.+?)(?:\nMode of Action|$)', re.IGNORECASE | re.DOTALL)
+_MOA_RE = re.compile(r'GROUP\s+([A-Z0-9]+)\s+HERBICIDE')
+_SIGNAL_RE = re.compile(r'(POISON|CAUTION|WARNING|DANGEROUS POISON)')
+
+# Plain text extraction: clip to the mediabox, no ligature/whitespace preservation
+# or image handling (clean_text normalizes the output anyway)
+TEXT_FLAGS = pymupdf.TEXT_MEDIABOX_CLIP
+# PDFs at least this large are memory-mapped rather than read through stdio
+MMAP_MIN_BYTES = 50 * 1024 * 1024
+# Pages with less text than this that carry images are treated as scans
+MIN_PAGE_TEXT_CHARS = 30
+SCANNED_PAGE_MARKER = "> [scanned page — not extracted]\n"
+# Pages need this many ruling lines/rectangles before find_tables runs
+MIN_TABLE_RULINGS = 4
+# Long PDFs are extracted in blocks of this many pages when page_workers > 1
+PAGES_PER_BLOCK = 16
+
+# Table cells: flatten line breaks/tabs and escape pipes in one C-level pass
+_CELL_TRANS = str.maketrans({'\n': ' ', '\r': ' ', '\t': ' ', '|': '\\|'})
 
 # Ensure output directory exists
 PARSED_DIR.mkdir(parents=True, exist_ok=True)
 
 
+@contextmanager
+def open_pdf(pdf_path: Path):
+    """
+    Open a PDF, memory-mapping files of MMAP_MIN_BYTES or more.
+    
+    MuPDF reads the mapped pages directly, so large scans are not copied
+    through userspace buffers. The document and mapping are closed on exit.
+    """
+    if pdf_path.stat().st_size < MMAP_MIN_BYTES:
+        doc = pymupdf.open(str(pdf_path))
+        try:
+            yield doc
+        finally:
+            doc.close()
+        return
+    
+    with open(pdf_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        view = memoryview(mm)
+        try:
+            doc = pymupdf.open(stream=view, filetype='pdf')
+            try:
+                yield doc
+            finally:
+                doc.close()
+        finally:
+            # Release the export so the mmap can close
+            view.release()
+
+
+def _likely_table(page: pymupdf.Page) -> bool:
+    """
+    Cheap probe for table rulings in the page's vector drawings.
+    
+    find_tables' default 'lines' strategy builds cells from drawn lines and
+    rectangles, so a page with fewer than MIN_TABLE_RULINGS of them cannot
+    yield a table and the full layout analysis is skipped.
+    """
+    rulings = 0
+    for path in page.get_cdrawings():
+        for item in path['items']:
+            if item[0] == 're':
+                rulings += 1
+            elif item[0] == 'l':
+                (x0, y0), (x1, y1) = item[1], item[2]
+                if abs(x0 - x1) < 1 or abs(y0 - y1) < 1:  # horizontal/vertical
+                    rulings += 1
+            if rulings >= MIN_TABLE_RULINGS:
+                return True
+    return False
+
+
 def extract_tables_from_page(page: pymupdf.Page) -> list[dict]:
     """
     Extract tables from a PDF page using PyMuPDF's table detection.
     
-    Returns list of tables with headers and rows.
+    Returns list of tables with headers, rows and page bbox.
     """
     tables = []
+    if not _likely_table(page):
+        return tables
     try:
         tab_finder = page.find_tables()
         for table in tab_finder:
@@ -36,13 +121,34 @@ def extract_tables_from_page(page: pymupdf.Page) -> list[dict]:
             if extracted and len(extracted) > 1:
                 tables.append({
                     'headers': extracted[0],
-                    'rows': extracted[1:]
+                    'rows': extracted[1:],
+                    'bbox': pymupdf.Rect(table.bbox),
                 })
     except Exception:
         pass  # Table extraction not always available
     return tables
 
 
+def text_outside_tables(page: pymupdf.Page, tables: list[dict]) -> str:
+    """
+    Return page text without the blocks already captured in tables.
+    
+    A text block is dropped when at least half of its area lies inside a
+    table bbox, so table cells are not emitted twice.
+    """
+    table_rects = [table['bbox'] for table in tables]
+    parts = []
+    for x0, y0, x1, y1, text, _, block_type in page.get_text("blocks", flags=TEXT_FLAGS):
+        if block_type != 0:  # image block
+            continue
+        rect = pymupdf.Rect(x0, y0, x1, y1)
+        area = rect.get_area()
+        if area and any((rect & table_rect).get_area() >= 0.5 * area for table_rect in table_rects):
+            continue
+        parts.append(text)
+    return "".join(parts)
+
+
 def table_to_markdown(table: dict) -> str:
     """Convert extracted table dict to markdown format."""
     if not table.get('headers') or not table.get('rows'):
@@ -52,25 +158,28 @@ def table_to_markdown(table: dict) -> str:
     rows = table['rows']
     
     # Clean headers
-    headers = [str(h).strip() if h else "" for h in headers]
+    headers = [(str(h) if h else "").translate(_CELL_TRANS).strip() for h in headers]
     
     # Build markdown table
-    md = "| " + " | ".join(headers) + " |\n"
-    md += "| " + " | ".join(["---"] * len(headers)) + " |\n"
+    md_lines = [
+        "| " + " | ".join(headers) + " |",
+        "| " + " | ".join(["---"] * len(headers)) + " |",
+    ]
     
     for row in rows:
-        cleaned_row = [str(cell).strip().replace('\n', ' ') if cell else "" for cell in row]
-        md += "| " + " | ".join(cleaned_row) + " |\n"
+        cleaned_row = [(str(cell) if cell else "").translate(_CELL_TRANS).strip() for cell in row]
+        md_lines.append("| " + " | ".join(cleaned_row) + " |")
     
-    return md
+    md_lines.append("")
+    return "\n".join(md_lines)
 
 
 def clean_text(text: str) -> str:
     """Clean extracted text for better readability."""
     # Remove excessive whitespace
-    text = re.sub(r'\n{3,}', '\n\n', text)
+    text = _WS_RE.sub('\n\n', text)
     # Fix common PDF extraction artifacts
-    text = re.sub(r'(\w)-\n(\w)', r'\1\2', text)  # Fix hyphenation
+    text = _HYPHEN_RE.sub(r'\1\2', text)  # Fix hyphenation
     return text.strip()
 
 
@@ -89,35 +198,98 @@ def extract_metadata_from_first_page(text: str) -> dict:
                 break
     
     # Also check Label Name field
-    label_match = re.search(r'Label Name:\s*\n?\s*(.+?)(?:\n|Signal)', text)
+    label_match = _LABEL_RE.search(text)
     if label_match:
         metadata['product_name'] = label_match.group(1).strip()
     
     # APVMA Number
-    apvma_match = re.search(r'(\d{4,6})\s*/\s*\d+', text)
+    apvma_match = _APVMA_RE.search(text)
     if apvma_match:
         metadata['apvma_number'] = apvma_match.group(1).strip()
     
     # Active Constituent
-    active_match = re.search(r'Active Constituent[s]?:\s*(.+?)(?:\nMode of Action|$)', text, re.IGNORECASE | re.DOTALL)
+    active_match = _ACTIVE_RE.search(text)
     if active_match:
         active = active_match.group(1).strip().split('\n')[0]
         metadata['active_constituent'] = active
     
     # Mode of Action Group
-    moa_match = re.search(r'GROUP\s+([A-Z0-9]+)\s+HERBICIDE', text)
+    moa_match = _MOA_RE.search(text)
     if moa_match:
         metadata['mode_of_action_group'] = moa_match.group(1)
     
     # Signal Heading (POISON, CAUTION, etc.)
-    signal_match = re.search(r'(POISON|CAUTION|WARNING|DANGEROUS POISON)', text)
+    signal_match = _SIGNAL_RE.search(text)
     if signal_match:
         metadata['signal_heading'] = signal_match.group(1)
     
     return metadata
 
 
-def parse_pdf_local(pdf_path: Path, output_path: Path, force: bool = False) -> dict:
+def build_frontmatter(pdf_path: Path, pages: int, metadata: dict) -> str:
+    """Render the YAML frontmatter for a parsed label."""
+    product_no = pdf_path.stem.replace('ELBL', '')
+    fm_lines = [
+        '---',
+        f'product_number: "{product_no}"',
+        f'source_file: "{pdf_path.name}"',
+        f'pages: {pages}',
+    ]
+    for key, value in metadata.items():
+        # Escape quotes and flatten newlines in YAML values
+        safe_value = str(value).translate(_YAML_ESCAPE)
+        fm_lines.append(f'{key}: "{safe_value}"')
+    return "\n".join(fm_lines) + "\n---\n\n"
+
+
+def extract_page(page: pymupdf.Page) -> tuple[str, list[dict]]:
+    """Return a page's cleaned text (without table-covered blocks) and its tables."""
+    page_text = page.get_text("text", flags=TEXT_FLAGS)
+    
+    # Scanned image-only pages have nothing to extract without OCR:
+    # mark them and skip the table finder
+    if len(page_text.strip()) < MIN_PAGE_TEXT_CHARS and page.get_images(full=False):
+        return clean_text(SCANNED_PAGE_MARKER), []
+    
+    tables = extract_tables_from_page(page)
+    if tables:
+        # Table cells go to the tables section; keep only the rest here
+        page_text = text_outside_tables(page, tables)
+    
+    # clean_text's patterns are line-local, and hyphenation never
+    # joined across pages (the page marker sits in between)
+    return clean_text(page_text), tables
+
+
+def _extract_block(pdf_path: Path, start: int, end: int) -> list[tuple[str, list[dict]]]:
+    """Extract pages [start, end) in a worker; documents are not picklable, so reopen."""
+    with open_pdf(pdf_path) as doc:
+        return [extract_page(doc[page_num]) for page_num in range(start, end)]
+
+
+def iter_pages(doc: pymupdf.Document, pdf_path: Path, page_workers: int = 1):
+    """
+    Yield (text, tables) for every page in order.
+    
+    Documents longer than PAGES_PER_BLOCK are split into blocks of pages
+    extracted by up to `page_workers` processes (one task per block rather
+    than per page keeps IPC low).
+    """
+    page_count = len(doc)
+    if page_workers <= 1 or page_count <= PAGES_PER_BLOCK:
+        for page in doc:
+            yield extract_page(page)
+        return
+    
+    starts = range(0, page_count, PAGES_PER_BLOCK)
+    ends = [min(start + PAGES_PER_BLOCK, page_count) for start in starts]
+    with ProcessPoolExecutor(max_workers=min(page_workers, len(starts))) as executor:
+        # map() yields blocks in page order
+        for block in executor.map(_extract_block, [pdf_path] * len(starts), starts, ends):
+            yield from block
+
+
+def parse_pdf_local(pdf_path: Path, output_path: Path, force: bool = False, page_workers: int = 1) -> dict:
     """
     Parse a single PDF locally using PyMuPDF.
     
@@ -125,6 +297,7 @@ def parse_pdf_local(pdf_path: Path, output_path: Path, force: bool = False) -> d
         pdf_path: Path to the PDF file
         output_path: Path for the markdown output
         force: If True, re-parse even if output exists
+        page_workers: Processes for block-of-pages extraction of long PDFs
         
     Returns:
         dict with 'success', 'skipped', 'error', 'pages' keys
@@ -132,69 +305,47 @@ def parse_pdf_local(pdf_path: Path, output_path: Path, force: bool = False) -> d
     result = {'success': False, 'skipped': False, 'error': None, 'pages': 0, 'metadata': {}}
     
     try:
-        # Check if already parsed
-        if output_path.exists() and not force:
+        # Check if already parsed (skipped entirely when forcing)
+        if not force and output_path.exists():
             result['skipped'] = True
             result['success'] = True
             return result
         
-        # Open PDF
-        doc = pymupdf.open(str(pdf_path))
-        result['pages'] = len(doc)
-        
-        # Extract text and tables from all pages
-        full_text_parts = []
-        all_tables = []
-        
-        for page_num, page in enumerate(doc):
-            page_text = page.get_text()
-            
-            # Extract tables from this page
-            tables = extract_tables_from_page(page)
-            if tables:
-                all_tables.extend(tables)
+        # Pages are cleaned and written as they are extracted, so memory
+        # stays O(page); the output only replaces a previous one when complete
+        tmp_path = output_path.with_name(output_path.name + '.tmp')
+        try:
+            # Binary output: each piece is encoded once by str.encode and
+            # written in one call, with no TextIOWrapper encoder in between
+            with open_pdf(pdf_path) as doc, open(tmp_path, 'wb') as f:
+                result['pages'] = len(doc)
+                if not result['pages']:
+                    f.write(build_frontmatter(pdf_path, 0, {}).encode())
+                all_tables = []
+                
+                for page_num, (page_text, tables) in enumerate(iter_pages(doc, pdf_path, page_workers)):
+                    all_tables.extend(tables)
+                    
+                    if page_num == 0:
+                        # Product metadata lives on the first page
+                        result['metadata'] = extract_metadata_from_first_page(page_text)
+                        frontmatter = build_frontmatter(pdf_path, result['pages'], result['metadata'])
+                        f.write(f"{frontmatter}{page_text}".encode())
+                    else:
+                        f.write(f"\n\n---\n## Page {page_num + 1}\n\n{page_text}".encode())
+                
+                # Add tables section if any were found
+                if all_tables:
+                    ts_parts = ["\n\n## Extracted Tables\n\n"]
+                    for i, table in enumerate(all_tables, 1):
+                        ts_parts.append(f"### Table {i}\n\n")
+                        ts_parts.append(table_to_markdown(table))
+                        ts_parts.append("\n")
+                    f.write("".join(ts_parts).encode())
             
-            # Add page marker and text
-            if page_num > 0:
-                full_text_parts.append(f"\n\n---\n## Page {page_num + 1}\n\n")
-            full_text_parts.append(page_text)
-        
-        doc.close()
-        
-        # Combine all text
-        full_text = clean_text("".join(full_text_parts))
-        
-        # Extract metadata from first page
-        metadata = extract_metadata_from_first_page(full_text)
-        result['metadata'] = metadata
-        
-        # Build YAML frontmatter
-        product_no = pdf_path.stem.replace('ELBL', '')
-        frontmatter = f"""---
-product_number: "{product_no}"
-source_file: "{pdf_path.name}"
-pages: {result['pages']}
-"""
-        for key, value in metadata.items():
-            # Escape quotes in YAML values
-            safe_value = str(value).replace('"', '\\"')
-            frontmatter += f'{key}: "{safe_value}"\n'
-        frontmatter += "---\n\n"
-        
-        # Add tables section if any were found
-        tables_section = ""
-        if all_tables:
-            tables_section = "\n\n## Extracted Tables\n\n"
-            for i, table in enumerate(all_tables, 1):
-                tables_section += f"### Table {i}\n\n"
-                tables_section += table_to_markdown(table)
-                tables_section += "\n"
-        
-        # Write output
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(frontmatter)
-            f.write(full_text)
-            f.write(tables_section)
+            os.replace(tmp_path, output_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
         
         result['success'] = True
         return result
@@ -204,18 +355,67 @@ pages: {result['pages']}
         return result
 
 
+def list_pdfs(directory: Path) -> list[Path]:
+    """List PDFs in one scandir pass (DirEntry names need no extra stat)."""
+    with os.scandir(directory) as entries:
+        return sorted(Path(entry.path) for entry in entries if entry.name.endswith('.pdf'))
+
+
+def parsed_stems(directory: Path) -> set[str]:
+    """Stems of the markdown outputs already in `directory`."""
+    with os.scandir(directory) as entries:
+        return {entry.name[:-3] for entry in entries if entry.name.endswith('.md')}
+
+
 def load_metadata() -> dict:
     """Load existing parsing metadata."""
     if METADATA_FILE.exists():
-        with open(METADATA_FILE, 'r') as f:
-            return json.load(f)
+        return orjson.loads(METADATA_FILE.read_bytes())
     return {'parsed': {}, 'failed': []}
 
 
 def save_metadata(metadata: dict):
-    """Save parsing metadata for tracking."""
-    with open(METADATA_FILE, 'w') as f:
-        json.dump(metadata, f, indent=2)
+    """Save parsing metadata for tracking (atomically, via a temp file)."""
+    tmp_path = METADATA_FILE.with_name(METADATA_FILE.name + '.tmp')
+    tmp_path.write_bytes(orjson.dumps(metadata))
+    os.replace(tmp_path, METADATA_FILE)
+
+
+def _metadata_log_path() -> Path:
+    """Append-only JSONL log of per-file outcomes, next to METADATA_FILE."""
+    return METADATA_FILE.with_suffix('.jsonl')
+
+
+def _append_metadata(log, stem: str, status: str, entry: dict = None):
+    log.write(orjson.dumps({'stem': stem, 'status': status, **(entry or {})}) + b'\n')
+
+
+def rollup_metadata() -> dict:
+    """
+    Fold the JSONL log into METADATA_FILE in one streaming pass.
+    
+    The log is removed afterwards; a log left behind by an interrupted run
+    is folded in by the next run.
+    """
+    metadata = load_metadata()
+    log_path = _metadata_log_path()
+    if not log_path.exists():
+        return metadata
+    
+    with open(log_path, 'rb') as log:
+        for line in log:
+            if not line.strip():
+                continue
+            record = orjson.loads(line)
+            stem = record.pop('stem')
+            if record.pop('status') == 'parsed':
+                metadata['parsed'][stem] = record
+            elif stem not in metadata['failed']:
+                metadata['failed'].append(stem)
+    
+    save_metadata(metadata)
+    log_path.unlink()
+    return metadata
 
 
 def parse_all(force: bool = False):
@@ -225,46 +425,78 @@ def parse_all(force: bool = False):
     Args:
         force: If True, re-parse all files even if output exists
     """
-    print("="*60)
+    # Imported here: only the batch run shows a progress bar
+    from tqdm import tqdm
+    
+    print(_BAR)
     print("LOCAL PDF PARSER (PyMuPDF)")
-    print("="*60)
+    print(_BAR)
     
-    pdf_files = sorted(LABELS_DIR.glob("*.pdf"))
+    pdf_files = list_pdfs(LABELS_DIR)
     print(f"Found {len(pdf_files)} PDF files to parse.\n")
     
-    metadata = load_metadata()
+    rollup_metadata()
     
     success_count = 0
     skip_count = 0
-    fail_count = 0
+    # Reported after the loop so the progress bar is not redrawn per failure
+    failures: list[tuple[str, str]] = []
+    # Log records written since the last flush
+    unflushed = 0
+    
+    # Skip existing outputs from one directory listing, not a stat per file
+    if not force:
+        existing = parsed_stems(PARSED_DIR)
+        pending = [pdf_path for pdf_path in pdf_files if pdf_path.stem not in existing]
+        skip_count = len(pdf_files) - len(pending)
+        pdf_files = pending
     
-    for pdf_path in tqdm(pdf_files, desc="Parsing PDFs"):
-        output_path = PARSED_DIR / f"{pdf_path.stem}.md"
-        result = parse_pdf_local(pdf_path, output_path, force=force)
+    # One PDF per worker process; results are logged here only, as they complete
+    with ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor, \
+            open(_metadata_log_path(), 'ab') as log:
+        # Each future maps to its (name, stem, output name), derived once per file
+        futures = {}
+        for pdf_path in pdf_files:
+            stem = pdf_path.stem
+            output_name = f"{stem}.md"
+            future = executor.submit(parse_pdf_local, pdf_path, PARSED_DIR / output_name, force)
+            futures[future] = (pdf_path.name, stem, output_name)
         
-        if result['skipped']:
-            skip_count += 1
-        elif result['success']:
-            success_count += 1
-            metadata['parsed'][pdf_path.stem] = {
-                'pages': result['pages'],
-                'output': f"{pdf_path.stem}.md",
-                'metadata': result['metadata']
-            }
-        else:
-            fail_count += 1
-            if pdf_path.stem not in metadata['failed']:
-                metadata['failed'].append(pdf_path.stem)
-            print(f"\n  ✗ {pdf_path.name}: {result['error']}")
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Parsing PDFs"):
+            name, stem, output_name = futures[future]
+            result = future.result()
+
+            if result['skipped']:
+                skip_count += 1
+            elif result['success']:
+                success_count += 1
+                _append_metadata(log, stem, 'parsed', {
+                    'pages': result['pages'],
+                    'output': output_name,
+                    'metadata': result['metadata']
+                })
+            else:
+                failures.append((name, result['error']))
+                _append_metadata(log, stem, 'failed')
+            
+            # Flush in batches so a crash loses at most a batch of records
+            if not result['skipped']:
+                unflushed += 1
+                if unflushed >= METADATA_FLUSH_EVERY:
+                    log.flush()
+                    unflushed = 0
     
-    save_metadata(metadata)
+    rollup_metadata()
+    
+    for name, error in failures:
+        print(f"  ✗ {name}: {error}")
     
-    print("\n" + "="*60)
+    print("\n" + _BAR)
     print("PARSING COMPLETE")
-    print("="*60)
+    print(_BAR)
     print(f"Successfully parsed: {success_count}")
     print(f"Skipped (existing):  {skip_count}")
-    print(f"Failed:              {fail_count}")
+    print(f"Failed:              {len(failures)}")
     print(f"\nOutput directory: {PARSED_DIR}")
 
 
@@ -293,7 +525,8 @@ def parse_single(pdf_name: str, force: bool = False) -> str:
     output_path = PARSED_DIR / f"{pdf_name}.md"
     
     print(f"Parsing {pdf_path.name}...")
-    result = parse_pdf_local(pdf_path, output_path, force=force)
+    # A single PDF gets the worker processes for its page blocks
+    result = parse_pdf_local(pdf_path, output_path, force=force, page_workers=MAX_WORKERS)
     
     if result['success']:
         if result['skipped']:
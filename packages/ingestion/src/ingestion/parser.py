@@ -9,18 +9,17 @@ required by downstream GraphRAG loaders.
 from __future__ import annotations
 
 import asyncio
-import json
+import functools
+import io
 import os
 import re
 from pathlib import Path
-from typing import Dict, Optional, Sequence
+from typing import TYPE_CHECKING, Dict, Optional, Sequence
 
-from dotenv import load_dotenv
+import orjson
 
-try:
+if TYPE_CHECKING:
     from llama_parse import LlamaParse
-except ImportError as exc:  # pragma: no cover - surfaced during installation issues
-    raise ImportError("llama-parse is required. Install via `uv add llama-parse --package packages/ingestion`.") from exc
 
 
 # ---------------------------------------------------------------------------
@@ -34,8 +33,28 @@ PARSED_DIR = DATA_DIR / "parsed"
 METADATA_FILE = PARSED_DIR / "parsing_metadata.json"
 DOTENV_PATH = ROOT_DIR / ".env"
 
+# Concurrent LlamaParse requests (override with LLAMAPARSE_CONCURRENCY)
+DEFAULT_CONCURRENCY = 8
+
+# Metadata log records buffered between flushes during a batch run
+METADATA_FLUSH_EVERY = 25
+
 PARSED_DIR.mkdir(parents=True, exist_ok=True)
-load_dotenv(dotenv_path=DOTENV_PATH, override=False)
+
+_DOTENV_LOADED = False
+
+
+def _load_env() -> None:
+    """Read DOTENV_PATH once, on first use rather than at import."""
+
+    global _DOTENV_LOADED
+    if _DOTENV_LOADED:
+        return
+    _DOTENV_LOADED = True
+
+    from dotenv import load_dotenv
+
+    load_dotenv(dotenv_path=DOTENV_PATH, override=False)
 
 
 # ---------------------------------------------------------------------------
@@ -65,9 +84,18 @@ def create_parser(
     continuous: bool = True,
     gpt4o: bool = False,
     verbose: bool = False,
+    num_workers: int = DEFAULT_CONCURRENCY,
 ) -> LlamaParse:
     """Instantiate a configured LlamaParse client."""
 
+    # Imported here: llama-parse pulls in llama-index-core and httpx, which
+    # is slow and unnecessary for callers that pass their own parser
+    try:
+        from llama_parse import LlamaParse
+    except ImportError as exc:  # pragma: no cover - surfaced during installation issues
+        raise ImportError("llama-parse is required. Install via `uv add llama-parse --package packages/ingestion`.") from exc
+
+    _load_env()
     key = api_key or os.getenv("LLAMA_CLOUD_API_KEY")
     if not key:
         raise ValueError("LLAMA_CLOUD_API_KEY is required to use LlamaParse")
@@ -77,7 +105,7 @@ def create_parser(
         "result_type": result_type,
         "language": language,
         "parsing_instruction": PARSING_INSTRUCTION,
-        "num_workers": 1,
+        "num_workers": num_workers,
         "verbose": verbose,
     }
 
@@ -95,18 +123,40 @@ def create_parser(
 # Helper utilities
 # ---------------------------------------------------------------------------
 
+_PRODUCT_NAME_RE = re.compile(r"Product Name:\s*\n?\s*(.+?)(?:\n|$)", re.IGNORECASE)
+_APVMA_RE = re.compile(r"APVMA Approval No:\s*\n?\s*(\d+(?:\s*/\s*\d+)?)", re.IGNORECASE)
+_ACTIVE_RE = re.compile(
+    r"Active Constituent[s]?:\s*\n?\s*(.+?)(?:\n\n|\nMode|\nStatement|\nNet)",
+    re.IGNORECASE | re.DOTALL,
+)
+_MOA_RE = re.compile(r"GROUP\s+([A-Z0-9]+)\s+HERBICIDE", re.IGNORECASE)
+
+
 def _document_text(document) -> str:
     """Safely extract text from a LlamaParse document."""
 
-    if hasattr(document, "text") and document.text:
-        return document.text
-    if hasattr(document, "get_content"):
-        content = document.get_content()
+    text = getattr(document, "text", None)
+    if text:
+        return text
+    get_content = getattr(document, "get_content", None)
+    if get_content is not None:
+        content = get_content()
         if content:
             return content
     return str(document)
 
 
+def _combined_text(documents: Sequence) -> str:
+    """Join document texts with blank lines, accumulated in one buffer."""
+
+    buffer = io.StringIO()
+    for index, document in enumerate(documents):
+        if index:
+            buffer.write("\n\n")
+        buffer.write(_document_text(document))
+    return buffer.getvalue()
+
+
 def _ensure_mapping(candidate) -> Dict[str, object]:
     if isinstance(candidate, dict):
         return candidate
@@ -141,39 +191,50 @@ def extract_product_metadata(text: str, filename: str) -> Dict[str, object]:
         "source_file": filename,
     }
 
-    name_match = re.search(r"Product Name:\s*\n?\s*(.+?)(?:\n|$)", text, re.IGNORECASE)
+    name_match = _PRODUCT_NAME_RE.search(text)
     if name_match:
         metadata["product_name"] = name_match.group(1).strip()
 
-    apvma_match = re.search(r"APVMA Approval No:\s*\n?\s*(\d+(?:\s*/\s*\d+)?)", text, re.IGNORECASE)
+    apvma_match = _APVMA_RE.search(text)
     if apvma_match:
         metadata["apvma_number"] = apvma_match.group(1).strip()
 
-    active_match = re.search(
-        r"Active Constituent[s]?:\s*\n?\s*(.+?)(?:\n\n|\nMode|\nStatement|\nNet)",
-        text,
-        re.IGNORECASE | re.DOTALL,
-    )
+    active_match = _ACTIVE_RE.search(text)
     if active_match:
         metadata["active_constituent"] = active_match.group(1).strip().replace("\n", " ")
 
-    group_match = re.search(r"GROUP\s+([A-Z0-9]+)\s+HERBICIDE", text, re.IGNORECASE)
+    group_match = _MOA_RE.search(text)
     if group_match:
         metadata["mode_of_action_group"] = group_match.group(1)
 
     return metadata
 
 
+# Characters that force a YAML value to be quoted, and the escaping applied
+_YAML_SPECIAL = frozenset(':\n"')
+_YAML_ESCAPE = str.maketrans({'"': '\\"', "\n": " "})
+
+
+@functools.lru_cache(maxsize=16)
+def _frontmatter_prefixes(keys: tuple) -> tuple:
+    """Rendered ``key: `` prefixes, built once per metadata shape.
+
+    Every label in a batch yields the same keys, so only the values are
+    formatted per document.
+    """
+
+    return tuple(f"{key}: " for key in keys)
+
+
 def _build_frontmatter(metadata: Dict[str, object]) -> str:
     """Render YAML frontmatter for parsed documents."""
 
     lines = ["---"]
-    for key, value in metadata.items():
-        if isinstance(value, str) and (":" in value or "\n" in value or '"' in value):
-            safe = value.replace('"', '\"')
-            lines.append(f"{key}: \"{safe}\"")
+    for prefix, value in zip(_frontmatter_prefixes(tuple(metadata)), metadata.values()):
+        if isinstance(value, str) and not _YAML_SPECIAL.isdisjoint(value):
+            lines.append(f"{prefix}\"{value.translate(_YAML_ESCAPE)}\"")
         else:
-            lines.append(f"{key}: {value}")
+            lines.append(f"{prefix}{value}")
     lines.append("---\n\n")
     return "\n".join(lines)
 
@@ -203,7 +264,7 @@ async def parse_pdf(
         "metadata": {},
     }
 
-    if output_path.exists() and not force:
+    if not force and output_path.exists():
         result["success"] = True
         result["skipped"] = True
         return result
@@ -216,7 +277,7 @@ async def parse_pdf(
         if not documents:
             raise ValueError("LlamaParse returned no documents")
 
-        combined_text = "\n\n".join(_document_text(doc) for doc in documents)
+        combined_text = _combined_text(documents)
         if not combined_text.strip():
             raise ValueError("Parsed output is empty")
 
@@ -226,70 +287,159 @@ async def parse_pdf(
         result["metadata"] = metadata
         result["pages"] = metadata["pages"]
 
-        frontmatter = _build_frontmatter(metadata)
-        output_path.write_text(frontmatter + combined_text, encoding="utf-8")
+        # Two binary writes: the (possibly multi-MB) body is never copied
+        # into a concatenated string just to be written
+        with output_path.open("wb") as fh:
+            fh.write(_build_frontmatter(metadata).encode("utf-8"))
+            fh.write(combined_text.encode("utf-8"))
 
         result["success"] = True
         return result
 
     except Exception as exc:  # pragma: no cover - tested via unit mocks
         result["error"] = str(exc)
-        if output_path.exists():
-            output_path.unlink(missing_ok=True)
+        output_path.unlink(missing_ok=True)
         return result
 
 
+def list_pdfs(directory: Path) -> list[Path]:
+    """List PDFs in one scandir pass (DirEntry names need no extra stat)."""
+
+    with os.scandir(directory) as entries:
+        return sorted(Path(entry.path) for entry in entries if entry.name.endswith(".pdf"))
+
+
+def parsed_stems(directory: Path) -> set[str]:
+    """Stems of the markdown outputs already in ``directory``."""
+
+    with os.scandir(directory) as entries:
+        return {entry.name[:-3] for entry in entries if entry.name.endswith(".md")}
+
+
 def load_metadata() -> Dict[str, object]:
     """Load existing parsing metadata."""
 
     if METADATA_FILE.exists():
-        return json.loads(METADATA_FILE.read_text(encoding="utf-8"))
+        return orjson.loads(METADATA_FILE.read_bytes())
     return {"parsed": {}, "failed": []}
 
 
 def save_metadata(metadata: Dict[str, object]) -> None:
-    """Persist parsing metadata to disk."""
+    """Persist parsing metadata to disk, atomically via a temp file."""
+
+    tmp_path = METADATA_FILE.with_name(METADATA_FILE.name + ".tmp")
+    tmp_path.write_bytes(orjson.dumps(metadata))
+    os.replace(tmp_path, METADATA_FILE)
+
+
+def _metadata_log_path() -> Path:
+    """Append-only JSONL log of per-file outcomes, next to METADATA_FILE."""
+
+    return METADATA_FILE.with_suffix(".jsonl")
+
+
+def _append_metadata(log, stem: str, status: str, entry: Optional[Dict[str, object]] = None) -> None:
+    log.write(orjson.dumps({"stem": stem, "status": status, **(entry or {})}) + b"\n")
+
+
+def rollup_metadata() -> Dict[str, object]:
+    """Fold the JSONL log into METADATA_FILE in one streaming pass.
 
-    METADATA_FILE.write_text(json.dumps(metadata, indent=2), encoding="utf-8")
+    The log is removed afterwards; a log left behind by an interrupted run
+    is folded in by the next run.
+    """
+
+    metadata_store = load_metadata()
+    log_path = _metadata_log_path()
+    if not log_path.exists():
+        return metadata_store
+
+    parsed = metadata_store.setdefault("parsed", {})
+    failed = metadata_store.setdefault("failed", [])
+    with log_path.open("rb") as log:
+        for line in log:
+            if not line.strip():
+                continue
+            record = orjson.loads(line)
+            stem = record.pop("stem")
+            if record.pop("status") == "parsed":
+                parsed[stem] = record
+                if stem in failed:
+                    failed.remove(stem)
+            elif stem not in failed:
+                failed.append(stem)
+
+    save_metadata(metadata_store)
+    log_path.unlink()
+    return metadata_store
 
 
 async def parse_directory(
     parser: LlamaParse,
     *,
     force: bool = False,
+    concurrency: Optional[int] = None,
 ) -> Dict[str, int]:
-    """Parse every PDF in the labels directory sequentially."""
+    """Parse every PDF in the labels directory with bounded concurrency.
 
-    pdf_files = sorted(LABELS_DIR.glob("*.pdf"))
-    metadata_store = load_metadata()
+    At most ``concurrency`` requests (default: ``LLAMAPARSE_CONCURRENCY`` or
+    ``DEFAULT_CONCURRENCY``) are in flight. Each outcome is appended to the
+    JSONL metadata log as it completes and rolled up into METADATA_FILE at
+    the end.
+    """
 
-    stats = {"parsed": 0, "skipped": 0, "failed": 0}
+    if concurrency is None:
+        _load_env()
+        concurrency = int(os.getenv("LLAMAPARSE_CONCURRENCY", DEFAULT_CONCURRENCY))
+    semaphore = asyncio.Semaphore(concurrency)
 
-    for pdf_path in pdf_files:
+    pdf_files = list_pdfs(LABELS_DIR)
+    rollup_metadata()
+
+    stats = {"parsed": 0, "skipped": 0, "failed": 0}
+    # Log records written since the last flush
+    unflushed = 0
+
+    # Skip existing outputs from one directory listing, not a stat per file
+    if not force:
+        existing = parsed_stems(PARSED_DIR)
+        pending = [pdf_path for pdf_path in pdf_files if pdf_path.stem not in existing]
+        stats["skipped"] = len(pdf_files) - len(pending)
+        pdf_files = pending
+
+    async def parse_one(pdf_path: Path, log) -> None:
+        nonlocal unflushed
         output_path = PARSED_DIR / f"{pdf_path.stem}.md"
-        result = await parse_pdf(parser, pdf_path, output_path, force=force)
+        async with semaphore:
+            try:
+                result = await parse_pdf(parser, pdf_path, output_path, force=force)
+            except Exception as exc:
+                result = {"success": False, "skipped": False, "error": str(exc)}
 
         if result["skipped"]:
             stats["skipped"] += 1
-            continue
-
-        if result["success"]:
+        elif result["success"]:
             stats["parsed"] += 1
-            metadata_store.setdefault("parsed", {})[pdf_path.stem] = {
+            _append_metadata(log, pdf_path.stem, "parsed", {
                 "pages": result["pages"],
                 "output": output_path.name,
                 **result.get("metadata", {}),
-            }
-            failed = metadata_store.setdefault("failed", [])
-            if pdf_path.stem in failed:
-                failed.remove(pdf_path.stem)
+            })
         else:
             stats["failed"] += 1
-            failed = metadata_store.setdefault("failed", [])
-            if pdf_path.stem not in failed:
-                failed.append(pdf_path.stem)
+            _append_metadata(log, pdf_path.stem, "failed")
 
-    save_metadata(metadata_store)
+        # Flush in batches so a crash loses at most a batch of records
+        if not result["skipped"]:
+            unflushed += 1
+            if unflushed >= METADATA_FLUSH_EVERY:
+                log.flush()
+                unflushed = 0
+
+    with _metadata_log_path().open("ab") as log:
+        await asyncio.gather(*(parse_one(pdf_path, log) for pdf_path in pdf_files))
+
+    rollup_metadata()
     return stats
 
 
@@ -0,0 +1,156 @@
+"""
+Tests for the markdown cleaner.
+
+Run with: pytest tests/test_cleaner.py -v
+"""
+
+import sys
+import pytest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from ingestion import cleaner
+from ingestion.cleaner import (
+    NOISE_PATTERNS,
+    clean_content,
+    clean_directory,
+    deduplicate_sections,
+    read_markdown,
+    remove_noise,
+)
+
+
+HEADER = (
+    "# **ROUNDUP**\n**Herbicide**\n"
+    "Active Constituent: 450 g/L GLYPHOSATE\n"
+    "For the control of annual and perennial weeds\n"
+    "# **GROUP M HERBICIDE**\n"
+)
+PARA = "Apply to actively growing weeds when conditions favour uptake by the leaves."
+
+SAMPLE = (
+    "---\nproduct_number: 12345\n---\n"
+    + HEADER + "\n"
+    "5/01/99\nPage 1 of 18\n"
+    "Filename: Roundup.doc\n"
+    "Spray volume 50-100 L/ha<br>*apply evenly\n\n"
+    + PARA + "   \n\n\n\n\n"
+    "12<b></b>\n"
+    "**SAFETY DIRECTIONS**\nAvoid contact with eyes.\n"
+    "**DIRECTIONS FOR USE**\n\n"
+    + PARA + "\n\n"
+    + HEADER + "\n"
+    "|Col1|Weed|Rate|\n|Wild oats|1 L/ha|\n"
+)
+
+# Output of the original multi-pass cleaner for SAMPLE
+EXPECTED = (
+    "---\nproduct_number: 12345\n---\n\n"
+    "# **ROUNDUP**\n**Herbicide**\n"
+    "Active Constituent: 450 g/L GLYPHOSATE\n"
+    "For the control of annual and perennial weeds\n"
+    "# **GROUP M HERBICIDE**\n\n"
+    "Spray volume 50-100 L/ha apply evenly\n\n"
+    + PARA + "\n\n"
+    "**DIRECTIONS FOR USE**\n\n"
+    "For the control of annual and perennial weeds\n\n"
+    "|Weed|Rate|\n|Wild oats|1 L/ha|\n"
+)
+
+
+class TestCleanContent:
+    """Test that cleaning output is unchanged by the optimized passes."""
+
+    def test_matches_reference_output(self):
+        """Noise removal, deduplication and whitespace cleanup match the original cleaner."""
+        assert clean_content(SAMPLE) == EXPECTED
+
+    def test_idempotent(self):
+        """Cleaning already-cleaned text changes nothing."""
+        assert clean_content(EXPECTED) == EXPECTED
+
+    def test_deduplicate_sections_keeps_first(self):
+        """Repeated boilerplate is removed after its first occurrence only."""
+        group = "# **GROUP M HERBICIDE**"
+        text = f"{group}\nfirst\n{group}\nsecond\n{group}\nthird"
+        assert deduplicate_sections(text) == f"{group}\nfirst\n\nsecond\n\nthird"
+
+    def test_whitespace_cleanup(self):
+        """Trailing spaces are stripped and blank runs collapse to one line."""
+        assert clean_content("a  \t\n\n\n\nb\t\n\n") == "\na\n\nb\n"
+
+    def test_noise_exposed_by_earlier_pattern(self):
+        """A match created by an earlier substitution is still removed later."""
+        # Stripping the tag leaves a standalone number for a later pattern
+        assert remove_noise("keep\n12<b></b>\nkeep") == "keep\n\nkeep"
+
+
+class TestNoisePrefilter:
+    """Test the optional Hyperscan prefilter against plain `re`."""
+
+    def test_prefilter_matches_plain_re(self):
+        """Skipping passes via the prefilter gives the same text as running all of them."""
+        pytest.importorskip("hyperscan")
+        assert cleaner.NOISE_PREFILTER is not None
+
+        for text in (SAMPLE, EXPECTED, "keep\n12<b></b>\nkeep", ""):
+            with patch('ingestion.cleaner.NOISE_PREFILTER', None):
+                expected = remove_noise(text)
+            assert remove_noise(text) == expected
+
+    def test_prefilter_covers_every_pattern(self):
+        """Each noise pattern's own match is reported by the prefilter."""
+        pytest.importorskip("hyperscan")
+        samples = {
+            0: "5/01/99",
+            1: "Page 4",
+            5: "<br>",
+            len(NOISE_PATTERNS) - 1: "Telephone 131126 Australia-wide.",
+        }
+        for index, text in samples.items():
+            assert index in cleaner.scan_noise_candidates(text)
+
+
+class TestCleanFiles:
+    """Test file reading and directory cleaning."""
+
+    def test_read_markdown_mmap_matches_read_text(self, tmp_path):
+        """Large files decoded from a memory map normalise newlines like read_text."""
+        path = tmp_path / 'big.md'
+        path.write_bytes("Weed café\r\nline\rend\n".encode('utf-8'))
+        expected = path.read_text(encoding='utf-8')
+        with patch('ingestion.cleaner.MMAP_THRESHOLD', 0):
+            assert read_markdown(path) == expected
+
+    def test_clean_directory_skips_unchanged(self, tmp_path):
+        """Outputs match clean_content, and a second run skips unchanged inputs."""
+        input_dir = tmp_path / 'parsed'
+        output_dir = tmp_path / 'cleaned'
+        input_dir.mkdir()
+        for name in ('a.md', 'b.md'):
+            (input_dir / name).write_text(SAMPLE, encoding='utf-8')
+
+        summary = clean_directory(input_dir, output_dir)
+        assert summary['files_succeeded'] == 2
+        assert summary['files_skipped'] == 0
+        for name in ('a.md', 'b.md'):
+            assert (output_dir / name).read_text(encoding='utf-8') == EXPECTED
+
+        summary = clean_directory(input_dir, output_dir)
+        assert summary['files_succeeded'] == 0
+        assert summary['files_skipped'] == 2
+
+    def test_clean_directory_workers(self, tmp_path):
+        """Worker processes produce the same outputs as cleaning in-process."""
+        input_dir = tmp_path / 'parsed'
+        input_dir.mkdir()
+        for i in range(4):
+            (input_dir / f'{i}.md').write_text(SAMPLE, encoding='utf-8')
+
+        summary = clean_directory(input_dir, tmp_path / 'cleaned', workers=2)
+        assert summary['files_succeeded'] == 4
+        for i in range(4):
+            assert (tmp_path / 'cleaned' / f'{i}.md').read_text(encoding='utf-8') == EXPECTED
@@ -0,0 +1,225 @@
+"""
+Tests for the Gemini parser's rate limiting, retries and response cache.
+
+Run with: pytest tests/test_gemini_parser.py -v
+"""
+
+import asyncio
+import sys
+import pytest
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+pytest.importorskip("google.genai")
+
+from google.genai import errors
+
+from ingestion import gemini_parser
+from ingestion.gemini_parser import (
+    GeminiRateLimiter,
+    TimeoutBreaker,
+    generate_with_retry,
+    load_cached_response,
+    parse_pdf_graph_ready,
+    save_cached_response,
+)
+
+
+GOOD_LABEL = {
+    'product_name': 'ROUNDUP',
+    'apvma_number': '12345',
+    'active_constituents': ['450 g/L glyphosate'],
+    'identified_crops': ['Wheat'],
+    'identified_weeds': ['Wild oats'],
+    'usage_scenarios': [{
+        'crop': 'Wheat',
+        'weed_common_name': 'Wild oats',
+        'states': ['NSW'],
+        'rate_value': 1.0,
+        'rate_unit': 'L/ha',
+        'rate_full_text': '1 L/ha',
+    }],
+}
+
+
+class FakeClock:
+    """Stands in for time.monotonic; sleeping advances it instantly."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    fake = FakeClock()
+    with patch.object(gemini_parser, 'time', MagicMock(monotonic=fake.monotonic)), \
+            patch('ingestion.gemini_parser.asyncio.sleep', fake.sleep):
+        yield fake
+
+
+class TestRateLimiter:
+    """Test the sliding-window limiter and the timeout breaker."""
+
+    @pytest.mark.asyncio
+    async def test_request_limit(self, clock):
+        """A request beyond the RPM budget waits for the window to slide."""
+        limiter = GeminiRateLimiter(rpm=2, tpm=1_000_000, headroom=1.0)
+        await limiter.acquire(10)
+        await limiter.acquire(10)
+        assert clock.now == 0
+        await limiter.acquire(10)
+        assert clock.now == 60
+
+    @pytest.mark.asyncio
+    async def test_token_limit(self, clock):
+        """A request beyond the TPM budget waits; an oversized one runs alone."""
+        limiter = GeminiRateLimiter(rpm=100, tpm=1000, headroom=1.0)
+        await limiter.acquire(600)
+        await limiter.acquire(600)
+        assert clock.now == 60
+        await limiter.acquire(5000)
+        assert clock.now == 120
+
+    @pytest.mark.asyncio
+    async def test_breaker_spaces_requests(self, clock):
+        """Consecutive timeouts trip the breaker; a success resets the count."""
+        limiter = GeminiRateLimiter(rpm=100, tpm=1_000_000, headroom=1.0)
+        breaker = TimeoutBreaker(limiter, threshold=2, pause=30.0)
+        breaker.record(True)
+        breaker.record(False)
+        breaker.record(True)
+        assert not breaker.tripped
+
+        breaker.record(True)
+        assert breaker.tripped
+        assert limiter.min_interval == 30.0
+
+        await limiter.acquire(10)
+        await limiter.acquire(10)
+        assert clock.now == 30
+
+    def test_breaker_recovers(self):
+        """After `recovery` successes in a row the breaker resets the spacing."""
+        limiter = GeminiRateLimiter(rpm=100, tpm=1_000_000, headroom=1.0)
+        breaker = TimeoutBreaker(limiter, threshold=1, pause=30.0, recovery=2)
+        breaker.record(True)
+        breaker.record(False)
+        breaker.record(True)
+        breaker.record(False)
+        assert breaker.tripped
+
+        breaker.record(False)
+        assert not breaker.tripped
+        assert limiter.min_interval == 0.0
+
+    @pytest.mark.asyncio
+    async def test_tripped_breaker_admits_one_file(self):
+        """While tripped, only one file at a time is in progress."""
+        limiter = GeminiRateLimiter(rpm=100, tpm=1_000_000, headroom=1.0)
+        breaker = TimeoutBreaker(limiter, threshold=1)
+        in_flight = []
+
+        async def work():
+            async with breaker.admit():
+                in_flight.append(1)
+                peak = len(in_flight)
+                await asyncio.sleep(0.01)
+                in_flight.pop()
+                return peak
+
+        assert max(await asyncio.gather(work(), work(), work())) == 3
+        breaker.record(True)
+        assert max(await asyncio.gather(work(), work(), work())) == 1
+
+
+class TestParseTimeout:
+    """Test that the per-file timeout covers the API work only."""
+
+    @pytest.fixture
+    def pdf_path(self, tmp_path):
+        path = tmp_path / '12345ELBL.pdf'
+        path.write_bytes(b'%PDF /Type /Page')
+        with patch('ingestion.gemini_parser.load_cached_response', return_value=None), \
+                patch('ingestion.gemini_parser.save_cached_response'):
+            yield path
+
+    @pytest.mark.asyncio
+    async def test_limiter_wait_not_counted(self, pdf_path):
+        """Time queued on the limiter does not time the file out."""
+        async def queued(*args, **kwargs):
+            await asyncio.sleep(0.2)
+
+        limiter = MagicMock(acquire=queued)
+        with patch('ingestion.gemini_parser._parse_uncached', AsyncMock(return_value=GOOD_LABEL)):
+            data = await parse_pdf_graph_ready(pdf_path, MagicMock(), limiter=limiter, timeout=0.1)
+        assert data == GOOD_LABEL
+
+    @pytest.mark.asyncio
+    async def test_slow_api_times_out(self, pdf_path):
+        """API work longer than the timeout raises asyncio.TimeoutError."""
+        async def slow(*args):
+            await asyncio.sleep(1)
+
+        with patch('ingestion.gemini_parser._parse_uncached', slow):
+            with pytest.raises(asyncio.TimeoutError):
+                await parse_pdf_graph_ready(pdf_path, MagicMock(), timeout=0.05)
+
+
+def _api_error(cls, code):
+    return cls(code, {'error': {'code': code, 'message': 'error', 'status': 'ERROR'}})
+
+
+class TestRetry:
+    """Test retries of google-genai API errors."""
+
+    @pytest.mark.asyncio
+    async def test_retries_server_errors(self, clock):
+        """429/503 are retried with backoff until the call succeeds."""
+        client = MagicMock()
+        client.models.generate_content.side_effect = [
+            _api_error(errors.ClientError, 429),
+            _api_error(errors.ServerError, 503),
+            'response',
+        ]
+        assert await generate_with_retry(client, 'model', [], None) == 'response'
+        assert client.models.generate_content.call_count == 3
+        assert clock.now > 0
+
+    @pytest.mark.asyncio
+    async def test_client_error_not_retried(self, clock):
+        """Other status codes propagate on the first attempt."""
+        client = MagicMock()
+        client.models.generate_content.side_effect = _api_error(errors.ClientError, 400)
+        with pytest.raises(errors.ClientError):
+            await generate_with_retry(client, 'model', [], None)
+        assert client.models.generate_content.call_count == 1
+
+
+class TestResponseCache:
+    """Test that only complete extractions are cached."""
+
+    def test_round_trip(self, tmp_path):
+        """A valid extraction is served back for the same model only."""
+        with patch('ingestion.gemini_parser.LLM_CACHE_DIR', tmp_path):
+            save_cached_response('abc', 'model', GOOD_LABEL)
+            assert load_cached_response('abc', 'model') == GOOD_LABEL
+            assert load_cached_response('abc', 'other-model') is None
+
+    def test_incomplete_not_cached(self, tmp_path):
+        """Empty usage_scenarios and schema-invalid data are not cached."""
+        invalid = {**GOOD_LABEL, 'usage_scenarios': [{'crop': 'Wheat'}]}
+        with patch('ingestion.gemini_parser.LLM_CACHE_DIR', tmp_path):
+            save_cached_response('empty', 'model', {**GOOD_LABEL, 'usage_scenarios': []})
+            save_cached_response('invalid', 'model', invalid)
+            assert load_cached_response('empty', 'model') is None
+            assert load_cached_response('invalid', 'model') is None
+        assert not any(tmp_path.iterdir())
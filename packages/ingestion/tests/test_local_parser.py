@@ -0,0 +1,106 @@
+"""
+Tests for the local PyMuPDF parser.
+
+Run with: pytest tests/test_local_parser.py -v
+"""
+
+import sys
+import pytest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+pymupdf = pytest.importorskip("pymupdf")
+
+from ingestion.local_parser import (
+    extract_metadata_from_first_page,
+    load_metadata,
+    parse_pdf_local,
+    rollup_metadata,
+    save_metadata,
+)
+
+
+class TestFirstPageMetadata:
+    """Test label metadata extraction from the first page."""
+
+    def test_fields_after_active_constituent(self):
+        """APVMA number, MoA group and signal heading following the active constituent are kept."""
+        text = (
+            "Label Name: ROUNDUP\n"
+            "Active Constituent: 450 g/L glyphosate\n"
+            "GROUP 9 HERBICIDE\n"
+            "APVMA Approval No: 12345/678\n"
+            "CAUTION\n"
+        )
+        assert extract_metadata_from_first_page(text) == {
+            'product_name': 'ROUNDUP',
+            'apvma_number': '12345',
+            'active_constituent': '450 g/L glyphosate',
+            'mode_of_action_group': '9',
+            'signal_heading': 'CAUTION',
+        }
+
+    def test_fields_beyond_label_header(self):
+        """Fields far down a long page are still found."""
+        text = "ROUNDUP HERBICIDE\n" + "filler line\n" * 2000 + "GROUP M HERBICIDE\nPOISON\n"
+        meta = extract_metadata_from_first_page(text)
+        assert meta['mode_of_action_group'] == 'M'
+        assert meta['signal_heading'] == 'POISON'
+
+
+class TestParsePDFLocal:
+    """Test local PDF parsing end to end."""
+
+    @pytest.fixture
+    def pdf_path(self, tmp_path):
+        path = tmp_path / '12345ELBL.pdf'
+        doc = pymupdf.open()
+        doc.new_page().insert_text((72, 72), "Label Name: ROUNDUP\nGROUP 9 HERBICIDE")
+        doc.new_page().insert_text((72, 72), "Directions for use")
+        doc.save(path)
+        doc.close()
+        return path
+
+    def test_parse_writes_markdown(self, pdf_path, tmp_path):
+        """Frontmatter comes from the first page; later pages get headings."""
+        output_path = tmp_path / '12345ELBL.md'
+        result = parse_pdf_local(pdf_path, output_path)
+
+        assert result['success'] is True
+        assert result['pages'] == 2
+        assert result['metadata']['mode_of_action_group'] == '9'
+        content = output_path.read_text()
+        assert content.startswith('---\nproduct_number: "12345"\n')
+        assert '## Page 2' in content
+        assert 'Directions for use' in content
+        assert not output_path.with_name(output_path.name + '.tmp').exists()
+
+    def test_existing_output_skipped(self, pdf_path, tmp_path):
+        """An existing output is left untouched unless forced."""
+        output_path = tmp_path / '12345ELBL.md'
+        output_path.write_text("existing content")
+        result = parse_pdf_local(pdf_path, output_path)
+        assert result['skipped'] is True
+        assert output_path.read_text() == "existing content"
+
+
+class TestMetadataLog:
+    """Test the JSONL metadata log rollup."""
+
+    def test_rollup_folds_log(self, tmp_path):
+        """Logged outcomes are merged into the metadata file and the log removed."""
+        meta_file = tmp_path / 'meta.json'
+        with patch('ingestion.local_parser.METADATA_FILE', meta_file):
+            save_metadata({'parsed': {'A': {'pages': 1}}, 'failed': []})
+            meta_file.with_suffix('.jsonl').write_bytes(
+                b'{"stem":"A","status":"parsed","pages":2}\n'
+                b'{"stem":"B","status":"failed"}\n'
+                b'{"stem":"B","status":"failed"}\n'
+            )
+            meta = rollup_metadata()
+            assert meta == {'parsed': {'A': {'pages': 2}}, 'failed': ['B']}
+            assert load_metadata() == meta
+            assert not meta_file.with_suffix('.jsonl').exists()
@@ -16,8 +16,11 @@ sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 
 from ingestion.parser import (
     parse_pdf,
+    extract_product_metadata,
     load_metadata,
     save_metadata,
+    rollup_metadata,
+    parse_directory,
     LABELS_DIR,
     PARSED_DIR,
     PARSING_INSTRUCTION,
@@ -48,8 +51,9 @@ class TestParserConfig:
             "growth stage",
             "Herbicide mode of action",
         ]
+        instruction = PARSING_INSTRUCTION.lower()
         for term in required_terms:
-            assert term.lower() in PARSING_INSTRUCTION.lower(), \
+            assert term.lower() in instruction, \
                 f"Parsing instruction missing key term: {term}"
         print("✓ Parsing instruction contains all required extraction targets")
 
@@ -81,6 +85,111 @@ class TestMetadata:
             print("✓ Metadata save/load working correctly")
 
 
+class TestMetadataLog:
+    """Test the JSONL metadata log and its rollup."""
+
+    def test_rollup_status_transitions(self, tmp_path):
+        """parsed -> failed -> parsed leaves the file parsed and not failed."""
+        meta_file = tmp_path / 'meta.json'
+        with patch('ingestion.parser.METADATA_FILE', meta_file):
+            from ingestion.parser import _append_metadata, _metadata_log_path
+
+            save_metadata({'parsed': {'A': {'pages': 1}}, 'failed': ['B']})
+            with _metadata_log_path().open('ab') as log:
+                _append_metadata(log, 'A', 'failed')
+            meta = rollup_metadata()
+            assert meta == {'parsed': {'A': {'pages': 1}}, 'failed': ['B', 'A']}
+
+            with _metadata_log_path().open('ab') as log:
+                _append_metadata(log, 'A', 'parsed', {'pages': 2, 'output': 'A.md'})
+                _append_metadata(log, 'B', 'parsed', {'pages': 3, 'output': 'B.md'})
+                _append_metadata(log, 'C', 'failed')
+                _append_metadata(log, 'C', 'failed')
+            meta = rollup_metadata()
+            assert meta == {
+                'parsed': {
+                    'A': {'pages': 2, 'output': 'A.md'},
+                    'B': {'pages': 3, 'output': 'B.md'},
+                },
+                'failed': ['C'],
+            }
+            assert load_metadata() == meta
+            assert not _metadata_log_path().exists()
+
+    def test_rollup_folds_leftover_log(self, tmp_path):
+        """A log left behind by an interrupted run is folded in by the next rollup."""
+        meta_file = tmp_path / 'meta.json'
+        with patch('ingestion.parser.METADATA_FILE', meta_file):
+            meta_file.with_suffix('.jsonl').write_bytes(
+                b'{"stem":"A","status":"parsed","pages":4}\n\n'
+            )
+            assert rollup_metadata() == {'parsed': {'A': {'pages': 4}}, 'failed': []}
+            assert rollup_metadata() == {'parsed': {'A': {'pages': 4}}, 'failed': []}
+
+    @pytest.mark.asyncio
+    async def test_parse_directory_flushes_in_batches(self, tmp_path):
+        """Records reach disk every METADATA_FLUSH_EVERY files and are rolled up at the end."""
+        labels = tmp_path / 'labels'
+        parsed = tmp_path / 'parsed'
+        labels.mkdir()
+        parsed.mkdir()
+        for stem in ('1ELBL', '2ELBL', '3ELBL', '4ELBL', 'BADELBL'):
+            (labels / f'{stem}.pdf').write_bytes(b'fake pdf')
+        meta_file = parsed / 'meta.json'
+        log_path = meta_file.with_suffix('.jsonl')
+        lines_on_disk = []
+
+        async def fake_parse_pdf(parser, pdf_path, output_path, force=False):
+            lines_on_disk.append(log_path.read_bytes().count(b'\n'))
+            if pdf_path.stem == 'BADELBL':
+                return {'success': False, 'skipped': False, 'error': 'API Error', 'pages': 0, 'metadata': {}}
+            return {'success': True, 'skipped': False, 'error': None, 'pages': 2,
+                    'metadata': {'product_number': pdf_path.stem[0]}}
+
+        with patch('ingestion.parser.LABELS_DIR', labels), \
+                patch('ingestion.parser.PARSED_DIR', parsed), \
+                patch('ingestion.parser.METADATA_FILE', meta_file), \
+                patch('ingestion.parser.METADATA_FLUSH_EVERY', 2), \
+                patch('ingestion.parser.parse_pdf', fake_parse_pdf):
+            stats = await parse_directory(MagicMock(), concurrency=1)
+
+            assert stats == {'parsed': 4, 'skipped': 0, 'failed': 1}
+            assert lines_on_disk == [0, 0, 2, 2, 4]
+            assert not log_path.exists()
+            meta = load_metadata()
+            assert meta['failed'] == ['BADELBL']
+            assert meta['parsed']['3ELBL'] == {'pages': 2, 'output': '3ELBL.md', 'product_number': '3'}
+            assert len(meta['parsed']) == 4
+
+
+class TestProductMetadata:
+    """Test label metadata extraction."""
+
+    def test_fields_after_active_constituent(self):
+        """APVMA number and MoA group following the active constituent are kept."""
+        text = (
+            "Product Name: ROUNDUP\n"
+            "Active Constituent: 450 g/L glyphosate\n"
+            "GROUP 9 HERBICIDE\n"
+            "APVMA Approval No: 12345/678\n\n"
+        )
+        meta = extract_product_metadata(text, "12345ELBL.pdf")
+        assert meta == {
+            'product_number': '12345',
+            'source_file': '12345ELBL.pdf',
+            'product_name': 'ROUNDUP',
+            'apvma_number': '12345/678',
+            'active_constituent': '450 g/L glyphosate GROUP 9 HERBICIDE APVMA Approval No: 12345/678',
+            'mode_of_action_group': '9',
+        }
+
+    def test_fields_beyond_label_header(self):
+        """Fields far down a long document are still found."""
+        text = "Product Name: ROUNDUP\n" + "filler line\n" * 2000 + "GROUP M HERBICIDE\n"
+        meta = extract_product_metadata(text, "12345ELBL.pdf")
+        assert meta['mode_of_action_group'] == 'M'
+
+
 class TestParsePDF:
     """Test PDF parsing functionality."""
 
@@ -1,27 +1,31 @@
 import json
+import os
 from pathlib import Path
 
+import orjson
+
 root = Path(__file__).resolve().parents[1] / 'data' / 'docling'
 report = []
 
-for p in sorted(root.glob('*.docling.json')):
+# one scandir pass; DirEntry names need no per-file stat
+with os.scandir(root) as entries:
+    docling_files = sorted(Path(e.path) for e in entries if e.name.endswith('.docling.json'))
+
+for p in docling_files:
     info = {"file": p.name}
+    # one read serves both the snippet and the parse
     try:
-        with p.open('r', encoding='utf-8') as f:
-            lines = [next(f) for _ in range(50)]
-    except StopIteration:
-        # file shorter than 50 lines; read all
-        with p.open('r', encoding='utf-8') as f:
-            lines = f.readlines()
+        raw = p.read_text(encoding='utf-8')
     except Exception as e:
         info.update({"error": str(e)})
         report.append(info)
         continue
-    snippet = ''.join(lines)
-    info['snippet_first50'] = snippet[:1000]
+    # first 50 lines, capped at 1000 chars
+    parts = raw[:1000].split('\n', 50)
+    info['snippet_first50'] = '\n'.join(parts[:50]) + ('\n' if len(parts) > 50 else '')
     # quick heuristic parsing
     try:
-        data = json.loads(p.read_text(encoding='utf-8'))
+        data = json.loads(raw)
     except Exception as e:
         info.update({"error": f"json:{e}"})
         report.append(info)
@@ -31,23 +35,12 @@ for p in sorted(root.glob('*.docling.json')):
     info['num_text_items'] = len(text_items)
     info['text_chars'] = sum(len(t.strip()) for t in text_items if isinstance(t, str))
     info['num_tables'] = len(tables)
-    total_cells = 0
-    nonempty_cells = 0
-    cell_chars = 0
-    for t in tables:
-        rows = t.get('rows') or []
-        for row in rows:
-            if not isinstance(row, list):
-                continue
-            for cell in row:
-                total_cells += 1
-                if isinstance(cell, str) and cell.strip():
-                    nonempty_cells += 1
-                    cell_chars += len(cell.strip())
+    cells = [c for t in tables for row in (t.get('rows') or []) if isinstance(row, list) for c in row]
+    nonempty = [s for s in (c.strip() for c in cells if isinstance(c, str)) if s]
     info.update({
-        'total_cells': total_cells,
-        'nonempty_cells': nonempty_cells,
-        'cell_chars': cell_chars,
+        'total_cells': len(cells),
+        'nonempty_cells': len(nonempty),
+        'cell_chars': sum(map(len, nonempty)),
     })
     # quality heuristics
     poor = False
@@ -66,7 +59,7 @@ for p in sorted(root.glob('*.docling.json')):
     report.append(info)
 
 out = Path(__file__).resolve().parents[1] / 'data' / 'docling_quality_report.json'
-out.write_text(json.dumps(report, indent=2), encoding='utf-8')
+out.write_bytes(orjson.dumps(report, option=orjson.OPT_INDENT_2))
 # print concise summary of poor files
 poor_files = [r['file'] for r in report if r.get('poor')]
 print('TOTAL_FILES', len(report))
@@ -7,6 +7,8 @@ import json
 import re
 from pathlib import Path
 
+import orjson
+
 # Files flagged as poorly extracted (with multiple blocks)
 flagged_files = [
     '31525ELBL.docling.json',
@@ -19,44 +21,33 @@ flagged_files = [
 
 docling_dir = Path('WeedAI/data/docling')
 
+_WHITESPACE_RE = re.compile(r'\s*')
+_HEADING_RE = re.compile(r'(?:^|\n)#+\s+')
+_MERGED_MARKER = b'"merged_from": "multiple_blocks_preserved"'
+
 def split_json_blocks(text):
-    """Split multiple JSON objects from text, handling appended markdown."""
+    """Split multiple JSON objects from text, handling appended markdown.
+    
+    Each object is found and parsed by the C decoder's raw_decode, so JSON
+    blocks come back as dicts rather than text to be parsed again.
+    """
+    decoder = json.JSONDecoder()
     blocks = []
-    current = ''
-    depth = 0
-    in_string = False
-    escape_next = False
-    
-    for char in text:
-        if escape_next:
-            current += char
-            escape_next = False
-            continue
-        if char == '\\' and in_string:
-            escape_next = True
-            current += char
-            continue
-        if char == '"' and not escape_next:
-            in_string = not in_string
-        if not in_string:
-            if char == '{':
-                depth += 1
-            elif char == '}':
-                depth -= 1
-                if depth == 0 and current.strip():
-                    current += char
-                    try:
-                        json.loads(current)
-                        blocks.append(('json', current))
-                        current = ''
-                        continue
-                    except json.JSONDecodeError:
-                        pass
-        current += char
+    end = 0
+    idx = _WHITESPACE_RE.match(text).end()
+    
+    while text.startswith('{', idx):
+        try:
+            obj, end = decoder.raw_decode(text, idx)
+        except json.JSONDecodeError:
+            break
+        blocks.append(('json', obj))
+        idx = _WHITESPACE_RE.match(text, end).end()
     
     # Remaining text is markdown/plain text
-    if current.strip() and not current.startswith('{'):
-        blocks.append(('markdown', current.strip()))
+    rest = text[end:]
+    if rest.strip() and not rest.startswith('{'):
+        blocks.append(('markdown', rest.strip()))
     
     return blocks
 
@@ -64,6 +55,14 @@ def merge_docling_file(filepath):
     """Merge multiple JSON blocks and markdown into a single docling JSON."""
     print(f"Processing {filepath.name}...")
     
+    # A merged file carries its marker as the first key; skip it without
+    # reading and splitting the whole file
+    with open(filepath, 'rb') as f:
+        head = f.read(512)
+    if _MERGED_MARKER in head:
+        print(f"  → Already merged, skipping.")
+        return False
+    
     text = filepath.read_text(encoding='utf-8')
     blocks = split_json_blocks(text)
     
@@ -71,23 +70,14 @@ def merge_docling_file(filepath):
         print(f"  → Only 1 block, no merge needed.")
         return False
     
-    json_blocks = [b for b in blocks if b[0] == 'json']
+    # JSON blocks arrive already parsed
+    parsed = [b[1] for b in blocks if b[0] == 'json']
     markdown_blocks = [b[1] for b in blocks if b[0] == 'markdown']
     
-    print(f"  → Found {len(json_blocks)} JSON blocks and {len(markdown_blocks)} markdown block(s)")
-    
-    # Parse all JSON blocks
-    parsed = []
-    for _, json_text in json_blocks:
-        try:
-            parsed.append(json.loads(json_text))
-        except json.JSONDecodeError as e:
-            print(f"  ⚠ Error parsing JSON block: {e}")
-            return False
+    print(f"  → Found {len(parsed)} JSON blocks and {len(markdown_blocks)} markdown block(s)")
     
     # Use first block as base
-    merged = parsed[0].copy()
-    merged['merged_from'] = 'multiple_blocks_preserved'
+    merged = {'merged_from': 'multiple_blocks_preserved', **parsed[0]}
     
     # Collect all tables from all blocks
     all_tables = []
@@ -106,7 +96,7 @@ def merge_docling_file(filepath):
     if markdown_blocks:
         combined_markdown = '\n\n'.join(markdown_blocks)
         # Split by common section markers
-        sections = re.split(r'(?:^|\n)#+\s+', combined_markdown)
+        sections = _HEADING_RE.split(combined_markdown)
         for section in sections:
             if section.strip():
                 all_text.append(section.strip())
@@ -129,7 +119,7 @@ def merge_docling_file(filepath):
         })
     
     # Write merged file
-    filepath.write_text(json.dumps(merged, indent=2, ensure_ascii=False), encoding='utf-8')
+    filepath.write_bytes(orjson.dumps(merged, option=orjson.OPT_INDENT_2))
     print(f"  ✓ Merged: {len(all_tables)} tables, {len(all_text)} text items")
     return True
 